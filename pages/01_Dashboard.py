@@ -4,15 +4,12 @@ import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
 import numpy as np
-from utils.shared_components import apply_dsv_styling, render_dsv_header
+from utils.shared_components import render_dsv_chrome
 
 st.set_page_config(page_title="Dashboard", page_icon="📊", layout="wide")
 
-# Apply consistent DSV styling
-apply_dsv_styling()
-
-# Render DSV header
-render_dsv_header()
+# Apply consistent DSV styling and render the DSV header
+render_dsv_chrome()
 
 st.title("📊 Dashboard")
 
@@ -32,7 +29,9 @@ selected_client = 'All'
 
 if not st.session_state.trips_data.empty and 'date' in st.session_state.trips_data.columns:
     try:
-        st.session_state.trips_data['date'] = pd.to_datetime(st.session_state.trips_data['date'])
+        # Imports already store datetime64; only legacy/edited frames need converting
+        if not pd.api.types.is_datetime64_any_dtype(st.session_state.trips_data['date']):
+            st.session_state.trips_data['date'] = pd.to_datetime(st.session_state.trips_data['date'])
         min_date = st.session_state.trips_data['date'].min().date()
         max_date = st.session_state.trips_data['date'].max().date()
         date_range = (min_date, max_date)
@@ -44,10 +43,11 @@ filtered_data = st.session_state.trips_data.copy()
 
 if date_range and len(date_range) == 2:
     start_date, end_date = date_range
-    filtered_data = filtered_data[
-        (filtered_data['date'].dt.date >= start_date) & 
-        (filtered_data['date'].dt.date <= end_date)
-    ]
+    # Inclusive of the whole end day, compared directly on the datetime64 values
+    filtered_data = filtered_data[filtered_data['date'].between(
+        pd.Timestamp(start_date),
+        pd.Timestamp(end_date) + pd.Timedelta(days=1, nanoseconds=-1)
+    )]
 
 if selected_truck != 'All':
     filtered_data = filtered_data[filtered_data['plate_number'] == selected_truck]
@@ -90,7 +90,7 @@ col1, col2 = st.columns(2)
 with col1:
     st.subheader("Number of Trips per Truck")
     if not filtered_data.empty and 'plate_number' in filtered_data.columns:
-        trips_per_truck = filtered_data['plate_number'].value_counts()
+        trips_per_truck = filtered_data.groupby('plate_number', observed=True).size().sort_values(ascending=False)
         fig_trips = px.bar(
             x=trips_per_truck.index,
             y=trips_per_truck.values,
@@ -105,7 +105,7 @@ with col1:
 with col2:
     st.subheader("Kilometers per Truck")
     if not filtered_data.empty and 'plate_number' in filtered_data.columns and 'distance_km' in filtered_data.columns:
-        km_per_truck = filtered_data.groupby('plate_number')['distance_km'].sum()
+        km_per_truck = filtered_data.groupby('plate_number', observed=True)['distance_km'].sum()
         fig_km = px.bar(
             x=km_per_truck.index,
             y=km_per_truck.values,
@@ -120,13 +120,13 @@ with col2:
 # Electricity consumption table
 st.subheader("Electricity Consumption per Truck")
 if not st.session_state.energy_consumption.empty:
-    consumption_summary = st.session_state.energy_consumption.groupby('plate_number').agg({
+    consumption_summary = st.session_state.energy_consumption.groupby('plate_number', observed=True).agg({
         'kwh_per_km': 'mean'
     }).round(3)
 
     # Merge with trip data to get total km and calculate total kWh
     if not filtered_data.empty:
-        trip_summary = filtered_data.groupby('plate_number').agg({
+        trip_summary = filtered_data.groupby('plate_number', observed=True).agg({
             'distance_km': 'sum'
         })
 
@@ -88,7 +88,8 @@ def load_mapped_ev_trucks_df() -> pd.DataFrame:
     """
     records = fetch_table(
         "ev.trucks",
-        select="truck_id, plate_number, make, model, battery_kwh"
+        select="truck_id, plate_number, make, model, battery_kwh",
+        key_column="truck_id",
     )
     df = to_df(records)
     if df.empty:
@@ -1,17 +1,14 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from utils.google_maps import calculate_distance_google_maps
+from utils.google_maps import calculate_distance_google_maps, calculate_distances_bulk
 import numpy as np
-from utils.shared_components import apply_dsv_styling, render_dsv_header
+from utils.shared_components import render_dsv_chrome
 
 st.set_page_config(page_title="Routes", page_icon="🛣️", layout="wide")
 
-# Apply consistent DSV styling
-apply_dsv_styling()
-
-# Render DSV header
-render_dsv_header()
+# Apply consistent DSV styling and render the DSV header
+render_dsv_chrome()
 
 st.markdown("""
 <style>
@@ -100,15 +97,12 @@ with st.form("add_route"):
             
             # Calculate distance using Google Maps if requested
             if calculate_google and not st.session_state.locations_data.empty:
-                from_coords = None
-                to_coords = None
-                
-                # Get coordinates for locations
-                for idx, row in st.session_state.locations_data.iterrows():
-                    if row['location_name'] == from_location:
-                        from_coords = row['coordinates']
-                    elif row['location_name'] == to_location:
-                        to_coords = row['coordinates']
+                coords_by_name = dict(zip(
+                    st.session_state.locations_data['location_name'],
+                    st.session_state.locations_data['coordinates']
+                ))
+                from_coords = coords_by_name.get(from_location)
+                to_coords = coords_by_name.get(to_location)
                 
                 if from_coords and to_coords:
                     with st.spinner("Calculating distance using Google Maps..."):
@@ -158,26 +152,34 @@ if not st.session_state.locations_data.empty:
             if st.button("Calculate All Missing Distances"):
                 with st.spinner("Calculating distances..."):
                     progress_bar = st.progress(0)
-                    total_routes = len(missing_distances)
+                    coords_by_name = dict(zip(
+                        st.session_state.locations_data['location_name'],
+                        st.session_state.locations_data['coordinates']
+                    ))
                     
-                    for idx, (route_idx, route) in enumerate(missing_distances.iterrows()):
-                        # Get coordinates
-                        from_coords = None
-                        to_coords = None
-                        
-                        for loc_idx, loc_row in st.session_state.locations_data.iterrows():
-                            if loc_row['location_name'] == route['from_location_name']:
-                                from_coords = loc_row['coordinates']
-                            elif loc_row['location_name'] == route['to_location_name']:
-                                to_coords = loc_row['coordinates']
-                        
-                        if from_coords and to_coords:
-                            distance = calculate_distance_google_maps(from_coords, to_coords)
-                            if distance:
-                                st.session_state.routes_data.loc[route_idx, 'km_distance'] = distance
-                                st.session_state.routes_data.loc[route_idx, 'source'] = 'Google Maps'
-                        
-                        progress_bar.progress((idx + 1) / total_routes)
+                    # Resolve coordinates for every route first, then fan out in one bulk call
+                    route_coords = {
+                        route_idx: (from_coords, to_coords)
+                        for route_idx, from_coords, to_coords in zip(
+                            missing_distances.index,
+                            missing_distances['from_location_name'].map(coords_by_name),
+                            missing_distances['to_location_name'].map(coords_by_name),
+                        )
+                        if isinstance(from_coords, str) and isinstance(to_coords, str)
+                    }
+                    
+                    distances = calculate_distances_bulk(
+                        route_coords.values(),
+                        on_progress=lambda done, total: progress_bar.progress(done / total)
+                    )
+                    
+                    for route_idx, coords in route_coords.items():
+                        distance = distances.get(coords)
+                        if distance:
+                            st.session_state.routes_data.loc[route_idx, 'km_distance'] = distance
+                            st.session_state.routes_data.loc[route_idx, 'source'] = 'Google Maps'
+                    
+                    progress_bar.progress(1.0)
                     
                     st.success("Distance calculation completed!")
                     st.rerun()
@@ -192,58 +194,69 @@ if not st.session_state.trips_data.empty:
         
         # Find unique route combinations in trip data
         if 'from_location' in st.session_state.trips_data.columns and 'to_location' in st.session_state.trips_data.columns:
-            trip_routes = st.session_state.trips_data[['from_location', 'to_location']].dropna().drop_duplicates()
+            # Dedupe and count in one pass; most-used routes come first
+            route_counts = (
+                st.session_state.trips_data
+                .dropna(subset=['from_location', 'to_location'])
+                .groupby(['from_location', 'to_location'], sort=False, observed=True)
+                .size()
+                .sort_values(ascending=False, kind='stable')
+            )
             
             # Check which routes don't exist yet
-            existing_routes = set()
-            for idx, row in st.session_state.routes_data.iterrows():
-                existing_routes.add((row['from_location_name'], row['to_location_name']))
+            routes_df = st.session_state.routes_data
+            if {'from_location_name', 'to_location_name'}.issubset(routes_df.columns):
+                existing_routes = pd.MultiIndex.from_frame(routes_df[['from_location_name', 'to_location_name']])
+                route_counts = route_counts[~route_counts.index.isin(existing_routes)]
             
-            new_routes = []
-            for idx, row in trip_routes.iterrows():
-                if (row['from_location'], row['to_location']) not in existing_routes:
-                    new_routes.append((row['from_location'], row['to_location']))
+            new_routes = list(route_counts.index)
             
             if new_routes:
                 st.write(f"Found {len(new_routes)} new routes from trip data:")
                 new_routes_df = pd.DataFrame(new_routes, columns=['From', 'To'])
+                new_routes_df['Trips'] = route_counts.values
                 st.dataframe(new_routes_df)
                 
                 if st.button("Generate Routes"):
                     with st.spinner("Generating routes..."):
-                        for from_loc, to_loc in new_routes:
-                            # Try to calculate distance
-                            distance = 0
-                            source = "Manual"
-                            
-                            # Get coordinates if available
-                            from_coords = None
-                            to_coords = None
-                            
-                            if not st.session_state.locations_data.empty:
-                                for loc_idx, loc_row in st.session_state.locations_data.iterrows():
-                                    if loc_row['location_name'] == from_loc:
-                                        from_coords = loc_row['coordinates']
-                                    elif loc_row['location_name'] == to_loc:
-                                        to_coords = loc_row['coordinates']
-                                
-                                if from_coords and to_coords:
-                                    calculated_distance = calculate_distance_google_maps(from_coords, to_coords)
-                                    if calculated_distance:
-                                        distance = calculated_distance
-                                        source = "Google Maps"
+                        coords_by_name = {}
+                        if not st.session_state.locations_data.empty:
+                            coords_by_name = dict(zip(
+                                st.session_state.locations_data['location_name'],
+                                st.session_state.locations_data['coordinates']
+                            ))
+                        
+                        # Resolve coordinates for every route first, then fan out in one bulk call
+                        route_coords = [
+                            (coords_by_name.get(from_loc), coords_by_name.get(to_loc))
+                            for from_loc, to_loc in new_routes
+                        ]
+                        distances = calculate_distances_bulk(
+                            coords for coords in route_coords if coords[0] and coords[1]
+                        )
+                        
+                        # Collect rows and append once; concatenating per route recopies the whole table
+                        generated_rows = []
+                        for (from_loc, to_loc), coords in zip(new_routes, route_coords):
+                            calculated_distance = distances.get(coords)
+                            if calculated_distance:
+                                distance = calculated_distance
+                                source = "Google Maps"
+                            else:
+                                distance = 0
+                                source = "Manual"
                             
-                            new_route = pd.DataFrame({
-                                'from_location_name': [from_loc],
-                                'to_location_name': [to_loc],
-                                'km_distance': [distance],
-                                'source': [source]
+                            generated_rows.append({
+                                'from_location_name': from_loc,
+                                'to_location_name': to_loc,
+                                'km_distance': distance,
+                                'source': source
                             })
-                            
-                            st.session_state.routes_data = pd.concat([
-                                st.session_state.routes_data,
-                                new_route
-                            ], ignore_index=True)
+                        
+                        st.session_state.routes_data = pd.concat([
+                            st.session_state.routes_data,
+                            pd.DataFrame(generated_rows)
+                        ], ignore_index=True)
                     
                     st.success(f"Generated {len(new_routes)} new routes!")
                     st.rerun()
@@ -1,8 +1,21 @@
+import io
+import zipfile
+from concurrent.futures import Future, ThreadPoolExecutor
 import streamlit as st
 import pandas as pd
+from openpyxl.utils.exceptions import InvalidFileException
 from datetime import datetime
+from typing import List, Tuple
 from utils.left_pane import setup_left_pane
 from utils.header import inject_top_header
+from utils.data_processing import parse_coordinates, parse_trip_dates, read_csv_upload
+
+# Optional fast Excel reader (python-calamine); falls back to pandas' default engine
+try:
+    import python_calamine  # noqa: F401
+    EXCEL_ENGINE = 'calamine'
+except Exception:
+    EXCEL_ENGINE = None
 
 # ---------- Page config ----------
 st.set_page_config(page_title="Data & Import", page_icon="📊", layout="wide")
@@ -25,25 +38,322 @@ st.markdown(
     unsafe_allow_html=True
 )
 
+def _append_rows(current: pd.DataFrame, new_rows: pd.DataFrame) -> pd.DataFrame:
+    """Append imported rows to a stored frame; the first import is stored without a concat."""
+    if current.empty:
+        cols = list(current.columns) + [c for c in new_rows.columns if c not in current.columns]
+        return new_rows.reindex(columns=cols).reset_index(drop=True)
+    return pd.concat([current, new_rows], ignore_index=True)
+
+def _apply_schema(df: pd.DataFrame, schema: dict) -> pd.DataFrame:
+    """Bulk-cast stored columns in one astype (re-run after appends so categories stay unified)."""
+    return df.astype({c: t for c, t in schema.items() if c in df.columns})
+
+@st.cache_data(show_spinner=False)
+def _avg_efficiency(df: pd.DataFrame) -> pd.DataFrame:
+    """Average kWh/km per truck; cached so widget reruns skip the groupby."""
+    df = df.dropna(subset=["plate_number","kwh_per_km"])
+    return (df.astype({"plate_number": "category"})
+              .groupby("plate_number", as_index=False, observed=True, sort=False)["kwh_per_km"]
+              .mean())
+
+# Template downloads are constant bytes; only the trip example date changes
+ENERGY_TEMPLATE_CSV = (
+    b"plate_number,period,kwh_per_km\n"
+    b"ABC123,2024-01,1.2\n"
+    b"DEF456,2024-01,1.1\n"
+)
+LOCATIONS_TEMPLATE_CSV = (
+    b"location_name,coordinates\n"
+    b'Warehouse A,"40.7128,-74.0060"\n'
+    b'Customer Site B,"40.7589,-73.9851"\n'
+)
+ROUTES_TEMPLATE_CSV = (
+    b"from_location_name,to_location_name,km_distance,source\n"
+    b"Warehouse A,Customer Site B,45.2,Manual\n"
+    b"Customer Site B,Warehouse A,45.2,Manual\n"
+)
+
+def _trip_template_csv() -> bytes:
+    return (
+        "date,customer,from_location,to_location,tons_loaded,truck_type,plate_number,distance_km\n"
+        f"{datetime.now().strftime('%Y-%m-%d')},Example Customer,Warehouse A,Customer Site B,15.5,Electric,ABC123,45.2\n"
+    ).encode('utf-8')
+
+# ---------- Cached upload parsing (keyed on file name + content) ----------
+TMS_MAPPING = {
+    'Head Plate Number': 'plate_number',
+    'Customer': 'customer',
+    'Orgin': 'from_location',
+    'Destination': 'to_location',
+    'Total Weight': 'tons_loaded',
+    'Departure Date': 'date',
+    'Trip KM': 'distance_km',
+    'Req. Truck Type': 'truck_type'
+}
+TMS_COLS = frozenset(TMS_MAPPING)
+
+# Trip import column sets (stored column order, warn-if-missing, cannot-import-without)
+TRIP_COLUMNS = ('date','customer','from_location','to_location','tons_loaded','truck_type','plate_number','distance_km')
+TRIP_REQUIRED = ('date','customer','from_location','to_location','tons_loaded','truck_type','plate_number')
+TRIP_ESSENTIAL = ('customer','from_location','to_location','plate_number')
+# Fill values for blank or absent trip fields (text blanks stay '', truck type defaults to Electric)
+TRIP_DEFAULTS = {
+    **{c: '' for c in ('customer','from_location','to_location','plate_number')},
+    'tons_loaded': 0.0, 'truck_type': 'Electric', 'distance_km': 0.0
+}
+AVG_EFFICIENCY_COLS = frozenset({'plate_number','kwh_per_km'})
+
+# Identifier columns are read as text so codes like "00123" keep their leading zeros
+TRIP_DTYPES = {c: 'str' for c in ['customer','from_location','to_location','truck_type','plate_number']}
+ENERGY_DTYPES = {'plate_number': 'str', 'period': 'str'}
+LOCATION_DTYPES = {'location_name': 'str', 'coordinates': 'str'}
+ROUTE_DTYPES = {'from_location_name': 'str', 'to_location_name': 'str', 'source': 'str'}
+
+# Low-cardinality text columns are stored as categories (smaller frames, dict-backed groupby)
+TRIP_CATEGORY_COLS = ('customer','from_location','to_location','truck_type','plate_number')
+ENERGY_CATEGORY_COLS = ('plate_number','period')
+
+# Storage dtypes applied to the session_state frames after every import
+TRIP_SCHEMA = {**{c: 'category' for c in TRIP_CATEGORY_COLS}, 'tons_loaded': 'float32', 'distance_km': 'float32'}
+ENERGY_SCHEMA = {**{c: 'category' for c in ENERGY_CATEGORY_COLS}, 'kwh_per_km': 'float32'}
+# Free-text columns that get edited in place elsewhere use Arrow strings (pyarrow ships with Streamlit)
+TEXT_DTYPE = 'string[pyarrow]'
+LOCATION_SCHEMA = {'location_name': TEXT_DTYPE, 'coordinates': TEXT_DTYPE}
+ROUTE_SCHEMA = {'from_location_name': TEXT_DTYPE, 'to_location_name': TEXT_DTYPE, 'km_distance': 'float32', 'source': TEXT_DTYPE}
+
+# Empty session frames start out with their stored dtypes instead of object columns
+STATE_SCHEMAS = {
+    'trips_data': {
+        'date': 'datetime64[ns]', 'customer': 'category', 'from_location': 'category',
+        'to_location': 'category', 'tons_loaded': 'float32', 'truck_type': 'category',
+        'plate_number': 'category', 'distance_km': 'float32'
+    },
+    'energy_consumption': {'plate_number': 'category', 'period': 'category', 'kwh_per_km': 'float32'},
+    'locations_data': {'location_name': TEXT_DTYPE, 'coordinates': TEXT_DTYPE, 'lat': 'float32', 'lng': 'float32'},
+    'routes_data': {
+        'from_location_name': TEXT_DTYPE, 'to_location_name': TEXT_DTYPE,
+        'km_distance': 'float32', 'source': TEXT_DTYPE
+    },
+}
+
 # ---------- Robust session state (prevents first-load crashes) ----------
+def _empty_frame(schema: dict) -> pd.DataFrame:
+    return pd.DataFrame({c: pd.Series(dtype=t) for c, t in schema.items()})
+
 def _ensure_state():
     ss = st.session_state
     if "emission_factor" not in ss:
         ss.emission_factor = 0.251  # sensible default; adjust to your baseline
-    if "trips_data" not in ss:
-        ss.trips_data = pd.DataFrame(columns=[
-            'date','customer','from_location','to_location',
-            'tons_loaded','truck_type','plate_number','distance_km'
-        ])
-    if "energy_consumption" not in ss:
-        ss.energy_consumption = pd.DataFrame(columns=['plate_number','period','kwh_per_km'])
-    if "locations_data" not in ss:
-        ss.locations_data = pd.DataFrame(columns=['location_name','coordinates'])
-    if "routes_data" not in ss:
-        ss.routes_data = pd.DataFrame(columns=['from_location_name','to_location_name','km_distance','source'])
+    for key, schema in STATE_SCHEMAS.items():
+        if key not in ss:
+            ss[key] = _empty_frame(schema)
 
 _ensure_state()
 
+# What a malformed upload can raise while being read: bad CSV, undecodable text, broken workbook,
+# a zip that isn't an xlsx (pandas OptionError is a KeyError), or .xls without xlrd installed
+UPLOAD_ERRORS = (ValueError, OSError, KeyError, ImportError, zipfile.BadZipFile, InvalidFileException)
+
+# CSV uploads above this size get an early head preview while the full parse runs
+LARGE_CSV_BYTES = 5 * 1024 * 1024
+DISPLAY_ROW_LIMIT = 500
+
+def _read_upload(name: str, data: bytes, dtype=None, usecols=None) -> pd.DataFrame:
+    """Parse a CSV/Excel upload; usecols (a collection of names) skips every other column at read time."""
+    buf = io.BytesIO(data)
+    if name.lower().endswith('.csv'):
+        return read_csv_upload(buf, dtype=dtype, usecols=usecols)
+    excel_usecols = None if usecols is None else (lambda c: c in usecols)
+    return pd.read_excel(buf, dtype=dtype, usecols=excel_usecols, engine=EXCEL_ENGINE)
+
+@st.cache_data(show_spinner=False)
+def _parse_upload(name: str, data: bytes, dtype=None, usecols=None) -> pd.DataFrame:
+    return _read_upload(name, data, dtype, usecols)
+
+@st.cache_data(show_spinner=False)
+def _upload_preview(name: str, data: bytes, dtype=None, usecols=None) -> Tuple[pd.DataFrame, Tuple[str, ...]]:
+    """Head rows and column names of an upload; reruns copy these instead of the whole parsed frame."""
+    df = _parse_upload(name, data, dtype, usecols)
+    return df.head(), tuple(df.columns)
+
+def _missing_essentials(columns) -> Tuple[str, ...]:
+    return tuple(c for c in TRIP_ESSENTIAL if c not in columns)
+
+def _read_trip_upload(name: str, data: bytes) -> Tuple[pd.DataFrame, bool, Tuple[str, ...]]:
+    """
+    Parse a trip upload and auto-map TMS Excel exports. Returns (df, tms_detected, missing).
+    Files whose header lacks an essential column come back as an empty header-only frame, unparsed,
+    with those columns in `missing` so the caller can skip and report the file.
+    """
+    if name.lower().endswith('.csv'):
+        header = pd.read_csv(io.BytesIO(data), nrows=0).columns
+        missing = _missing_essentials(header)
+        if missing:
+            return pd.DataFrame(columns=header), False, missing
+        return _read_upload(name, data, TRIP_DTYPES, TRIP_COLUMNS), False, ()
+
+    # One workbook handle for both the header sniff and the full read (the archive is opened once)
+    with pd.ExcelFile(io.BytesIO(data), engine=EXCEL_ENGINE) as xls:
+        # Heuristic: sniff only the first rows for a TMS header row (first row with >= 3 TMS names)
+        head = xls.parse(header=None, nrows=6)
+        head = head.astype(str).apply(lambda col: col.str.strip())
+        is_header = head.isin(TMS_COLS).sum(axis=1).to_numpy() >= 3
+        if not is_header.any():
+            header = head.iloc[0].tolist() if len(head) else []
+            missing = _missing_essentials(header)
+            if missing:
+                return pd.DataFrame(columns=header), False, missing
+            return xls.parse(dtype=TRIP_DTYPES, usecols=lambda c: c in TRIP_COLUMNS), False, ()
+        header_row_idx = int(is_header.argmax())
+
+        mapped = [TMS_MAPPING.get(c, c) for c in head.iloc[header_row_idx]]
+        missing = _missing_essentials(mapped)
+        if missing:
+            return pd.DataFrame(columns=[c for c in TMS_MAPPING.values() if c in mapped]), True, missing
+
+        # Full read starts at the detected header and skips non-TMS columns
+        df = xls.parse(
+            header=header_row_idx,
+            usecols=lambda c: str(c).strip() in TMS_COLS
+        )
+    df.columns = [str(c).strip() for c in df.columns]
+    df = df.rename(columns=TMS_MAPPING)
+    keep_cols = [c for c in TMS_MAPPING.values() if c in df.columns]
+    return df[keep_cols], True, ()
+
+# Trip files can take seconds to parse; do it on workers so a widget rerun does not restart it
+# (the C/Arrow/calamine readers release the GIL, so several files parse side by side)
+@st.cache_resource(show_spinner=False)
+def _parse_executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=4)
+
+def _trip_parse_futures(files) -> List[Future]:
+    """Start background parses for new uploads and reuse the ones already running."""
+    ss = st.session_state
+    pending = ss.get('_pending_trip_parse', {})
+    current = {}
+    for f in files:
+        sig = (f.name, f.file_id)
+        current[sig] = pending.get(sig) or _parse_executor().submit(_read_trip_upload, f.name, f.getvalue())
+    ss._pending_trip_parse = current
+    return list(current.values())
+
+# ---------- Simple upload tabs (energy / locations / routes) ----------
+def _store_energy(current: pd.DataFrame, clean_df: pd.DataFrame) -> pd.DataFrame:
+    clean_df['kwh_per_km'] = pd.to_numeric(clean_df['kwh_per_km'], errors='coerce', downcast='float')
+    return _apply_schema(_append_rows(current, clean_df), ENERGY_SCHEMA)
+
+def _store_locations(current: pd.DataFrame, clean_df: pd.DataFrame) -> pd.DataFrame:
+    # Dedupe only the upload, then replace stored rows whose names it redefines
+    clean_df = clean_df.drop_duplicates(subset=['location_name'], keep='last')
+    # Store numeric lat/lng next to the raw string so later consumers skip re-parsing
+    clean_df[['lat', 'lng']] = parse_coordinates(clean_df['coordinates'])
+    kept = current[~current['location_name'].isin(clean_df['location_name'])]
+    return _apply_schema(_append_rows(kept, clean_df), LOCATION_SCHEMA)
+
+def _store_routes(current: pd.DataFrame, clean_df: pd.DataFrame) -> pd.DataFrame:
+    clean_df['km_distance'] = pd.to_numeric(clean_df['km_distance'], errors='coerce', downcast='float')
+    return _apply_schema(_append_rows(current, clean_df), ROUTE_SCHEMA)
+
+UPLOAD_TABS = {
+    'energy': {
+        'title': "Import Energy Consumption Data",
+        'columns_help': "- plate_number\n- period (YYYY-MM)\n- kwh_per_km",
+        'template_csv': ENERGY_TEMPLATE_CSV,
+        'template_label': "📥 Download Energy Template CSV",
+        'template_file': "energy_consumption_template.csv",
+        'upload_label': "Upload Energy Consumption Data",
+        'upload_key': "energy_upload",
+        'dtypes': ENERGY_DTYPES,
+        'required': ('plate_number','period','kwh_per_km'),
+        'button': "Import Energy Data",
+        'session_key': 'energy_consumption',
+        'store': _store_energy,
+        'noun': "energy consumption records",
+    },
+    'locations': {
+        'title': "Import Locations Data",
+        'columns_help': "- location_name\n- coordinates (lat,lng)",
+        'template_csv': LOCATIONS_TEMPLATE_CSV,
+        'template_label': "📥 Download Locations Template CSV",
+        'template_file': "locations_template.csv",
+        'upload_label': "Upload Locations Data",
+        'upload_key': "locations_upload",
+        'dtypes': LOCATION_DTYPES,
+        'required': ('location_name','coordinates'),
+        'button': "Import Locations",
+        'session_key': 'locations_data',
+        'store': _store_locations,
+        'noun': "locations",
+    },
+    'routes': {
+        'title': "Import Routes Data",
+        'columns_help': "- from_location_name\n- to_location_name\n- km_distance\n- source",
+        'template_csv': ROUTES_TEMPLATE_CSV,
+        'template_label': "📥 Download Routes Template CSV",
+        'template_file': "routes_template.csv",
+        'upload_label': "Upload Routes Data",
+        'upload_key': "routes_upload",
+        'dtypes': ROUTE_DTYPES,
+        'required': ('from_location_name','to_location_name','km_distance','source'),
+        'button': "Import Routes",
+        'session_key': 'routes_data',
+        'store': _store_routes,
+        'noun': "routes",
+    },
+}
+
+def _render_upload_tab(cfg: dict) -> None:
+    """Template download, upload, preview, required-column check and import for one tab."""
+    st.markdown(f"#### {cfg['title']}")
+    c1, c2 = st.columns(2, gap="large")
+
+    with c1:
+        st.write("**Required columns:**")
+        st.write(cfg['columns_help'])
+
+    with c2:
+        st.download_button(
+            label=cfg['template_label'],
+            data=cfg['template_csv'],
+            file_name=cfg['template_file'],
+            mime="text/csv"
+        )
+
+    uploaded = st.file_uploader(
+        cfg['upload_label'],
+        type=['csv','xlsx','xls'],
+        key=cfg['upload_key']
+    )
+
+    if uploaded is None:
+        return
+
+    # One copy of the upload per run; the cached parsers are keyed on these bytes
+    data = uploaded.getvalue()
+    try:
+        preview, columns = _upload_preview(uploaded.name, data, cfg['dtypes'], cfg['required'])
+    except UPLOAD_ERRORS as e:
+        st.error(f"Error reading file: {e}")
+        return
+
+    st.write("**Preview of uploaded data:**")
+    st.dataframe(preview, use_container_width=True)
+
+    required_cols = cfg['required']
+    missing = [c for c in required_cols if c not in columns]
+    if missing:
+        st.error(f"Missing required columns: {missing}")
+    elif st.button(cfg['button'], type="primary"):
+        # The full frame is only pulled from the cache when it is actually imported
+        df = _parse_upload(uploaded.name, data, cfg['dtypes'], cfg['required'])
+        clean_df = df.dropna(subset=list(required_cols)).copy()
+        key = cfg['session_key']
+        st.session_state[key] = cfg['store'](st.session_state[key], clean_df)
+        st.success(f"Successfully imported {len(clean_df)} {cfg['noun']}!")
+        st.rerun()
+
 # ---------- Page lead-in (no st.title—header already injected) ----------
 st.markdown("### Current System Data")
 
@@ -52,14 +362,15 @@ col1, col2 = st.columns([2,1], gap="large")
 with col1:
     st.markdown("#### Energy Consumption")
     if not st.session_state.energy_consumption.empty:
-        st.dataframe(st.session_state.energy_consumption, use_container_width=True)
+        # Only the newest rows go to the frontend; large tables are slow to serialize
+        n_energy = len(st.session_state.energy_consumption)
+        if n_energy > DISPLAY_ROW_LIMIT:
+            st.caption(f"Showing the latest {DISPLAY_ROW_LIMIT} of {n_energy:,} records.")
+        st.dataframe(st.session_state.energy_consumption.tail(DISPLAY_ROW_LIMIT), use_container_width=True, hide_index=True)
         # Average efficiency by truck (guard against missing column)
         df_ec = st.session_state.energy_consumption
-        if {"plate_number","kwh_per_km"}.issubset(df_ec.columns):
-            avg_eff = (df_ec
-                       .dropna(subset=["plate_number","kwh_per_km"])
-                       .groupby("plate_number", as_index=False)["kwh_per_km"]
-                       .mean())
+        if AVG_EFFICIENCY_COLS.issubset(df_ec.columns):
+            avg_eff = _avg_efficiency(df_ec)
             st.markdown("**Average kWh/km by Truck**")
             st.dataframe(avg_eff, use_container_width=True)
         else:
@@ -106,19 +417,9 @@ with tab1:
         )
 
     with c2:
-        template_data = pd.DataFrame({
-            'date': [datetime.now().strftime('%Y-%m-%d')],
-            'customer': ['Example Customer'],
-            'from_location': ['Warehouse A'],
-            'to_location': ['Customer Site B'],
-            'tons_loaded': [15.5],
-            'truck_type': ['Electric'],
-            'plate_number': ['ABC123'],
-            'distance_km': [45.2]
-        })
         st.download_button(
             label="📥 Download Trip Template CSV",
-            data=template_data.to_csv(index=False),
+            data=_trip_template_csv(),
             file_name="trip_data_template.csv",
             mime="text/csv"
         )
@@ -126,259 +427,116 @@ with tab1:
     uploaded_trips = st.file_uploader(
         "Upload Trip Data",
         type=['csv', 'xlsx', 'xls'],
-        key="trips_upload"
+        key="trips_upload",
+        accept_multiple_files=True
     )
 
-    if uploaded_trips is not None:
+    if uploaded_trips:
+        df = None
         try:
-            if uploaded_trips.name.lower().endswith('.csv'):
-                df = pd.read_csv(uploaded_trips)
+            futs = _trip_parse_futures(uploaded_trips)
+            if not all(f.done() for f in futs):
+                first = uploaded_trips[0]
+                early_preview = first.name.lower().endswith('.csv') and first.size > LARGE_CSV_BYTES
+                with st.status("Parsing trip files...", expanded=early_preview) as status:
+                    if early_preview:
+                        # Only the first rows are tokenized; the workers keep parsing the full files
+                        head = pd.read_csv(io.BytesIO(first.getvalue()), nrows=5, dtype=TRIP_DTYPES)
+                        st.dataframe(head, use_container_width=True)
+                    for f in futs:
+                        f.result()
+                    status.update(label="Trip files parsed", state="complete", expanded=False)
+            results = [f.result() for f in futs]
+        except UPLOAD_ERRORS as e:
+            st.error(f"Error reading file: {e}")
+        else:
+            # Futures come back in upload order; files lacking an essential column are left out, by name
+            skipped = [
+                f"{f.name} (missing {', '.join(r[2])})"
+                for f, r in zip(uploaded_trips, results) if r[2]
+            ]
+            kept = [r for r in results if not r[2]]
+            if not kept:
+                st.error("Missing essential columns, cannot import: " + "; ".join(skipped))
             else:
-                df = pd.read_excel(uploaded_trips)
-
-                # Heuristic: detect TMS header row in first few rows
-                tms_cols = {'Head Plate Number','Customer','Orgin','Destination','Total Weight','Departure Date','Trip KM','Req. Truck Type'}
-                header_row_idx = None
-                for i in range(min(5, len(df))):
-                    row_vals = set(str(v).strip() for v in list(df.iloc[i].values))
-                    if len(tms_cols.intersection(row_vals)) >= 3:
-                        header_row_idx = i
-                        break
-
-                if header_row_idx is not None:
-                    df.columns = df.iloc[header_row_idx]
-                    df = df.drop(range(header_row_idx + 1)).reset_index(drop=True)
-                    mapping = {
-                        'Head Plate Number': 'plate_number',
-                        'Customer': 'customer',
-                        'Orgin': 'from_location',
-                        'Destination': 'to_location',
-                        'Total Weight': 'tons_loaded',
-                        'Departure Date': 'date',
-                        'Trip KM': 'distance_km',
-                        'Req. Truck Type': 'truck_type'
-                    }
-                    df = df.rename(columns={k: v for k, v in mapping.items() if k in df.columns})
-                    keep_cols = [c for c in mapping.values() if c in df.columns]
-                    if keep_cols:
-                        df = df[keep_cols]
-                    st.info("✅ Detected TMS format – columns auto-mapped.")
+                if skipped:
+                    st.warning("Skipped files: " + "; ".join(skipped))
+                # Parsed frames are shared across reruns; validation below mutates its own copy
+                frames = [r[0] for r in kept]
+                df = frames[0].copy() if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+                tms_detected = any(r[1] for r in kept)
+
+        if df is not None:
+            if tms_detected:
+                st.info("✅ Detected TMS format – columns auto-mapped.")
 
             st.write("**Preview of uploaded data:**")
             st.dataframe(df.head(), use_container_width=True)
 
-            required_cols = ['date','customer','from_location','to_location','tons_loaded','truck_type','plate_number']
-            essential_cols = ['customer','from_location','to_location','plate_number']
-
-            missing_required = [c for c in required_cols if c not in df.columns]
+            # One hashed column set for every presence check below (keeps the tuples' order)
+            present = frozenset(df.columns)
+            missing_required = [c for c in TRIP_REQUIRED if c not in present]
             if missing_required:
                 st.warning(f"Missing columns: {missing_required}. Import will proceed with available data where possible.")
 
-            missing_essential = [c for c in essential_cols if c not in df.columns]
+            missing_essential = [c for c in TRIP_ESSENTIAL if c not in present]
             if missing_essential:
                 st.error(f"Missing essential columns: {missing_essential}. Cannot import.")
             else:
                 # Validation
                 total_rows = len(df)
-                available_required = [c for c in required_cols if c in df.columns]
-                for c in available_required:
-                    if df[c].isna().any():
-                        st.warning(f"Column '{c}' has missing values.")
+                available_required = [c for c in TRIP_REQUIRED if c in present]
+                na_counts = df[available_required].isna().sum()
+                na_counts = na_counts[na_counts > 0]
+                if not na_counts.empty:
+                    st.warning("Missing values: " + ", ".join(f"'{c}' ({n})" for c, n in na_counts.items()))
 
                 # Dates
                 if 'date' in df.columns:
                     with st.spinner("Parsing dates..."):
-                        df['date'] = pd.to_datetime(df['date'], errors='coerce')
+                        df['date'] = parse_trip_dates(df['date'])
                 else:
                     df['date'] = pd.Timestamp.now().date()
                     st.warning("No 'date' column found – using current date.")
 
-                valid_rows = len(df.dropna(subset=essential_cols))
+                # One mask drives both the metrics and the import below
+                valid_mask = df[list(TRIP_ESSENTIAL)].notna().all(axis=1).to_numpy()
+                valid_rows = int(valid_mask.sum())
                 m1, m2, m3 = st.columns(3)
                 m1.metric("Total Rows", total_rows)
                 m2.metric("Valid Rows", valid_rows)
                 m3.metric("Invalid Rows", total_rows - valid_rows)
 
                 if st.button("Import Trip Data", type="primary"):
-                    clean_df = df.dropna(subset=essential_cols).copy()
-
-                    # Defaults
-                    defaults = {'tons_loaded': 0.0, 'truck_type': 'Electric', 'distance_km': 0.0}
-                    for k, v in defaults.items():
-                        if k not in clean_df.columns:
-                            clean_df[k] = v
+                    clean_df = df.loc[valid_mask].copy()
 
-                    # Final column order
-                    final_cols = ['date','customer','from_location','to_location','tons_loaded','truck_type','plate_number','distance_km']
-                    for c in final_cols:
-                        if c not in clean_df.columns:
-                            clean_df[c] = defaults.get(c, '')
+                    # Final column order in one reindex; absent columns arrive as NaN and take the defaults below
+                    clean_df = clean_df.reindex(columns=list(TRIP_COLUMNS))
 
                     # Types
-                    clean_df['tons_loaded'] = pd.to_numeric(clean_df['tons_loaded'], errors='coerce').fillna(0.0)
-                    clean_df['distance_km'] = pd.to_numeric(clean_df['distance_km'], errors='coerce').fillna(0.0)
-                    for s in ['customer','from_location','to_location','truck_type','plate_number']:
-                        clean_df[s] = clean_df[s].astype(str).replace('nan','')
-
-                    clean_df = clean_df[final_cols]
-
-                    st.session_state.trips_data = pd.concat(
-                        [st.session_state.trips_data, clean_df],
-                        ignore_index=True
+                    for c in ('tons_loaded', 'distance_km'):
+                        clean_df[c] = pd.to_numeric(clean_df[c], errors='coerce', downcast='float')
+                    # One fill for every default, before the text cast so no 'nan' strings appear
+                    clean_df = clean_df.fillna(TRIP_DEFAULTS)
+                    text_cols = list(TRIP_CATEGORY_COLS)
+                    clean_df[text_cols] = clean_df[text_cols].astype(str)
+
+                    st.session_state.trips_data = _apply_schema(
+                        _append_rows(st.session_state.trips_data, clean_df),
+                        TRIP_SCHEMA
                     )
                     st.success(f"Successfully imported {len(clean_df)} trip records!")
                     st.rerun()
 
-        except Exception as e:
-            st.error(f"Error reading file: {e}")
-
-# --- Energy Consumption ---
+# --- Energy Consumption / Locations / Routes (shared flow, see UPLOAD_TABS) ---
 with tab2:
-    st.markdown("#### Import Energy Consumption Data")
-    c1, c2 = st.columns(2, gap="large")
-
-    with c1:
-        st.write("**Required columns:**")
-        st.write("- plate_number\n- period (YYYY-MM)\n- kwh_per_km")
-
-    with c2:
-        energy_template = pd.DataFrame({
-            'plate_number': ['ABC123','DEF456'],
-            'period': ['2024-01','2024-01'],
-            'kwh_per_km': [1.2, 1.1]
-        })
-        st.download_button(
-            label="📥 Download Energy Template CSV",
-            data=energy_template.to_csv(index=False),
-            file_name="energy_consumption_template.csv",
-            mime="text/csv"
-        )
-
-    uploaded_energy = st.file_uploader(
-        "Upload Energy Consumption Data",
-        type=['csv','xlsx','xls'],
-        key="energy_upload"
-    )
+    _render_upload_tab(UPLOAD_TABS['energy'])
 
-    if uploaded_energy is not None:
-        try:
-            df = pd.read_csv(uploaded_energy) if uploaded_energy.name.lower().endswith('.csv') else pd.read_excel(uploaded_energy)
-            st.write("**Preview of uploaded data:**")
-            st.dataframe(df.head(), use_container_width=True)
-
-            required_cols = ['plate_number','period','kwh_per_km']
-            missing = [c for c in required_cols if c not in df.columns]
-            if missing:
-                st.error(f"Missing required columns: {missing}")
-            else:
-                if st.button("Import Energy Data", type="primary"):
-                    clean_df = df.dropna(subset=required_cols).copy()
-                    st.session_state.energy_consumption = pd.concat(
-                        [st.session_state.energy_consumption, clean_df],
-                        ignore_index=True
-                    )
-                    st.success(f"Successfully imported {len(clean_df)} energy consumption records!")
-                    st.rerun()
-        except Exception as e:
-            st.error(f"Error reading file: {e}")
-
-# --- Locations ---
 with tab3:
-    st.markdown("#### Import Locations Data")
-    c1, c2 = st.columns(2, gap="large")
-
-    with c1:
-        st.write("**Required columns:**")
-        st.write("- location_name\n- coordinates (lat,lng)")
-
-    with c2:
-        locations_template = pd.DataFrame({
-            'location_name': ['Warehouse A','Customer Site B'],
-            'coordinates': ['40.7128,-74.0060','40.7589,-73.9851']
-        })
-        st.download_button(
-            label="📥 Download Locations Template CSV",
-            data=locations_template.to_csv(index=False),
-            file_name="locations_template.csv",
-            mime="text/csv"
-        )
-
-    uploaded_locations = st.file_uploader(
-        "Upload Locations Data",
-        type=['csv','xlsx','xls'],
-        key="locations_upload"
-    )
-
-    if uploaded_locations is not None:
-        try:
-            df = pd.read_csv(uploaded_locations) if uploaded_locations.name.lower().endswith('.csv') else pd.read_excel(uploaded_locations)
-            st.dataframe(df.head(), use_container_width=True)
-
-            required_cols = ['location_name','coordinates']
-            missing = [c for c in required_cols if c not in df.columns]
-            if missing:
-                st.error(f"Missing required columns: {missing}")
-            else:
-                if st.button("Import Locations", type="primary"):
-                    clean_df = df.dropna(subset=required_cols).copy()
-                    st.session_state.locations_data = (
-                        pd.concat([st.session_state.locations_data, clean_df], ignore_index=True)
-                          .drop_duplicates(subset=['location_name'], keep='last')
-                    )
-                    st.success(f"Successfully imported {len(clean_df)} locations!")
-                    st.rerun()
-        except Exception as e:
-            st.error(f"Error reading file: {e}")
+    _render_upload_tab(UPLOAD_TABS['locations'])
 
-# --- Routes ---
 with tab4:
-    st.markdown("#### Import Routes Data")
-    c1, c2 = st.columns(2, gap="large")
-
-    with c1:
-        st.write("**Required columns:**")
-        st.write("- from_location_name\n- to_location_name\n- km_distance\n- source")
-
-    with c2:
-        routes_template = pd.DataFrame({
-            'from_location_name': ['Warehouse A','Customer Site B'],
-            'to_location_name': ['Customer Site B','Warehouse A'],
-            'km_distance': [45.2, 45.2],
-            'source': ['Manual','Manual']
-        })
-        st.download_button(
-            label="📥 Download Routes Template CSV",
-            data=routes_template.to_csv(index=False),
-            file_name="routes_template.csv",
-            mime="text/csv"
-        )
-
-    uploaded_routes = st.file_uploader(
-        "Upload Routes Data",
-        type=['csv','xlsx','xls'],
-        key="routes_upload"
-    )
-
-    if uploaded_routes is not None:
-        try:
-            df = pd.read_csv(uploaded_routes) if uploaded_routes.name.lower().endswith('.csv') else pd.read_excel(uploaded_routes)
-            st.dataframe(df.head(), use_container_width=True)
-
-            required_cols = ['from_location_name','to_location_name','km_distance','source']
-            missing = [c for c in required_cols if c not in df.columns]
-            if missing:
-                st.error(f"Missing required columns: {missing}")
-            else:
-                if st.button("Import Routes", type="primary"):
-                    clean_df = df.dropna(subset=required_cols).copy()
-                    st.session_state.routes_data = pd.concat(
-                        [st.session_state.routes_data, clean_df],
-                        ignore_index=True
-                    )
-                    st.success(f"Successfully imported {len(clean_df)} routes!")
-                    st.rerun()
-        except Exception as e:
-            st.error(f"Error reading file: {e}")
+    _render_upload_tab(UPLOAD_TABS['routes'])
 
 # ---------- Data Summary ----------
 st.markdown("### Data Summary")
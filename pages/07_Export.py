@@ -1,18 +1,30 @@
 import streamlit as st
 import pandas as pd
 import io
+import openpyxl
 from datetime import datetime, timedelta
 import plotly.express as px
 from utils.calculations import calculate_emissions_report
-from utils.shared_components import apply_dsv_styling, render_dsv_header
+from utils.shared_components import render_dsv_chrome
 
-st.set_page_config(page_title="Export", page_icon="📤", layout="wide")
+# Faster xlsx writer when installed; falls back to openpyxl (a declared dependency)
+try:
+    import xlsxwriter
+    EXCEL_WRITER_ENGINE = 'xlsxwriter'
+except Exception:
+    EXCEL_WRITER_ENGINE = 'openpyxl'
 
-# Apply consistent DSV styling
-apply_dsv_styling()
+# Rows converted to cell values per step when streaming the complete export
+EXPORT_CHUNK_ROWS = 10_000
+# Report and download payloads are cached per window/customer/session; keep the
+# process-wide cache bounded so old payloads are evicted instead of piling up
+EXPORT_CACHE_TTL_S = 15 * 60
+EXPORT_CACHE_MAX_ENTRIES = 16
 
-# Render DSV header
-render_dsv_header()
+st.set_page_config(page_title="Export", page_icon="📤", layout="wide")
+
+# Apply consistent DSV styling and render the DSV header
+render_dsv_chrome()
 
 st.markdown("""
 <style>
@@ -38,7 +50,9 @@ col1, col2 = st.columns(2)
 with col1:
     # Get date range from trip data
     try:
-        st.session_state.trips_data['date'] = pd.to_datetime(st.session_state.trips_data['date'])
+        # Imports already store datetime64; only legacy/edited frames need converting
+        if not pd.api.types.is_datetime64_any_dtype(st.session_state.trips_data['date']):
+            st.session_state.trips_data['date'] = pd.to_datetime(st.session_state.trips_data['date'])
         min_date = st.session_state.trips_data['date'].min().date()
         max_date = st.session_state.trips_data['date'].max().date()
         
@@ -62,16 +76,102 @@ with col2:
     except:
         end_date = datetime.now().date()
 
-# Filter data by date range
-filtered_data = st.session_state.trips_data.copy()
+# Filter data by date range; the boolean selection already returns a new frame, so no upfront copy
+filtered_data = st.session_state.trips_data
 try:
-    filtered_data = filtered_data[
-        (filtered_data['date'].dt.date >= start_date) & 
-        (filtered_data['date'].dt.date <= end_date)
-    ]
+    # Inclusive of the whole end day, compared directly on the datetime64 values
+    filtered_data = filtered_data.loc[filtered_data['date'].between(
+        pd.Timestamp(start_date),
+        pd.Timestamp(end_date) + pd.Timedelta(days=1, nanoseconds=-1)
+    )]
 except:
     st.error("Error filtering data by date. Please check your trip data format.")
 
+# Mean kWh/km per truck, computed once and mapped onto trips by plate
+energy_df = st.session_state.energy_consumption
+truck_efficiency = (
+    energy_df.groupby('plate_number', observed=True, sort=False)['kwh_per_km'].mean()
+    if not energy_df.empty else pd.Series(dtype='float64')
+)
+
+@st.cache_data(ttl=EXPORT_CACHE_TTL_S, max_entries=EXPORT_CACHE_MAX_ENTRIES, show_spinner=False)
+def cached_emissions_report(trips, energy, emission_factor):
+    """Per-truck emissions for the selected window; reused until the trips, energy data or factor change"""
+    return calculate_emissions_report(trips, energy, emission_factor)
+
+@st.cache_data(ttl=EXPORT_CACHE_TTL_S, max_entries=EXPORT_CACHE_MAX_ENTRIES, show_spinner=False)
+def to_csv_bytes(df):
+    """CSV download payload; serialized once per distinct frame instead of on every rerun"""
+    return df.to_csv(index=False).encode('utf-8')
+
+@st.cache_data(ttl=EXPORT_CACHE_TTL_S, max_entries=EXPORT_CACHE_MAX_ENTRIES, show_spinner=False)
+def customer_report_bytes(customer, period, customer_data, customer_emissions):
+    """Customer report workbook; rebuilt only when the customer, period, trips or emissions change"""
+    output = io.BytesIO()
+    with pd.ExcelWriter(output, engine=EXCEL_WRITER_ENGINE) as writer:
+        # Customer summary
+        customer_summary = pd.DataFrame({
+            'Customer': [customer],
+            'Period': [period],
+            'Total Trips': [len(customer_data)],
+            'Total Distance (km)': [customer_data['distance_km'].sum()],
+            'Total Cargo (tons)': [customer_data['tons_loaded'].sum()],
+            'CO2 Emissions (kg)': [customer_emissions]
+        })
+        customer_summary.to_excel(writer, sheet_name='Customer Summary', index=False)
+        
+        # Trip details
+        customer_data.to_excel(writer, sheet_name='Trip Details', index=False)
+    return output.getvalue()
+
+def export_rows(df):
+    """Header followed by the value rows, converted one chunk at a time"""
+    yield [str(col) for col in df.columns]
+    for start in range(0, len(df), EXPORT_CHUNK_ROWS):
+        chunk = df.iloc[start:start + EXPORT_CHUNK_ROWS].astype(object)
+        # Missing values become blank cells, as with to_excel
+        chunk = chunk.where(chunk.notna(), None)
+        yield from chunk.itertuples(index=False, name=None)
+
+def stream_workbook(sheets):
+    """xlsx bytes written row by row, bypassing pd.ExcelWriter"""
+    output = io.BytesIO()
+    if EXCEL_WRITER_ENGINE == 'xlsxwriter':
+        # Rows go out strictly in order, so constant_memory can flush each one as it is written
+        wb = xlsxwriter.Workbook(output, {
+            'constant_memory': True,
+            'default_date_format': 'yyyy-mm-dd hh:mm:ss'
+        })
+        for sheet_name, df in sheets:
+            ws = wb.add_worksheet(sheet_name)
+            for row_num, row in enumerate(export_rows(df)):
+                ws.write_row(row_num, 0, row)
+        wb.close()
+    else:
+        wb = openpyxl.Workbook(write_only=True)
+        for sheet_name, df in sheets:
+            ws = wb.create_sheet(sheet_name)
+            for row in export_rows(df):
+                ws.append(row)
+        wb.save(output)
+    return output.getvalue()
+
+def trip_efficiency(trips):
+    """kWh/km of each trip's truck (NaN where the truck has no energy data)"""
+    return trips['plate_number'].map(truck_efficiency).astype('float64')
+
+# Every tab body runs on each rerun, so the figures shared by the report tabs are computed once here
+if not filtered_data.empty:
+    filtered_efficiency = trip_efficiency(filtered_data)
+    emissions_data = cached_emissions_report(
+        filtered_data,
+        energy_df,
+        st.session_state.emission_factor
+    )
+else:
+    filtered_efficiency = pd.Series(dtype='float64')
+    emissions_data = pd.DataFrame()
+
 st.write(f"**Selected period:** {start_date} to {end_date}")
 st.write(f"**Trips in period:** {len(filtered_data)}")
 
@@ -85,13 +185,6 @@ with tab1:
     st.subheader("📊 Monthly Emissions Report")
     
     if not filtered_data.empty:
-        # Calculate emissions for the period
-        emissions_data = calculate_emissions_report(
-            filtered_data,
-            st.session_state.energy_consumption,
-            st.session_state.emission_factor
-        )
-        
         # Display summary
         st.subheader("Report Summary")
         col1, col2, col3, col4 = st.columns(4)
@@ -110,7 +203,7 @@ with tab1:
         
         with col4:
             if not emissions_data.empty:
-                total_emissions = emissions_data['total_co2_kg'].sum()
+                total_emissions = float(emissions_data['total_co2_kg'].sum())
                 st.metric("Total CO2 Emissions", f"{total_emissions:,.0f} kg")
         
         # Show detailed emissions data
@@ -120,11 +213,11 @@ with tab1:
             
             # Create Excel report
             output = io.BytesIO()
-            with pd.ExcelWriter(output, engine='openpyxl') as writer:
+            with pd.ExcelWriter(output, engine=EXCEL_WRITER_ENGINE) as writer:
                 # Summary sheet
                 summary_data = pd.DataFrame({
                     'Metric': ['Total Trips', 'Total Distance (km)', 'Total Cargo (tons)', 'Total CO2 Emissions (kg)'],
-                    'Value': [total_trips, total_distance, total_cargo, emissions_data['total_co2_kg'].sum()]
+                    'Value': [total_trips, total_distance, total_cargo, total_emissions]
                 })
                 summary_data.to_excel(writer, sheet_name='Summary', index=False)
                 
@@ -133,23 +226,9 @@ with tab1:
                 
                 # Trip details
                 export_trips = filtered_data.copy()
-                # Add calculated emissions per trip
-                trip_emissions = []
-                for idx, trip in export_trips.iterrows():
-                    truck_efficiency = 1.0  # Default
-                    if not st.session_state.energy_consumption.empty:
-                        truck_data = st.session_state.energy_consumption[
-                            st.session_state.energy_consumption['plate_number'] == trip['plate_number']
-                        ]
-                        if not truck_data.empty:
-                            truck_efficiency = truck_data['kwh_per_km'].mean()
-                    
-                    trip_kwh = trip['distance_km'] * truck_efficiency
-                    trip_co2 = trip_kwh * st.session_state.emission_factor
-                    trip_emissions.append(trip_co2)
-                
-                export_trips['trip_kwh'] = [trip['distance_km'] * 1.0 for idx, trip in export_trips.iterrows()]
-                export_trips['trip_co2_kg'] = trip_emissions
+                # Add calculated emissions per trip (1.0 kWh/km for trucks without energy data)
+                export_trips['trip_kwh'] = export_trips['distance_km'] * filtered_efficiency.fillna(1.0)
+                export_trips['trip_co2_kg'] = export_trips['trip_kwh'] * st.session_state.emission_factor
                 export_trips.to_excel(writer, sheet_name='Trip Details', index=False)
             
             st.download_button(
@@ -173,7 +252,8 @@ with tab2:
         selected_customer = st.selectbox("Select Customer", customers)
         
         if selected_customer:
-            customer_data = filtered_data[filtered_data['customer'] == selected_customer]
+            customer_mask = filtered_data['customer'] == selected_customer
+            customer_data = filtered_data[customer_mask]
             
             # Calculate customer-specific metrics
             col1, col2, col3 = st.columns(3)
@@ -192,16 +272,9 @@ with tab2:
             
             # Calculate emissions for this customer
             if not st.session_state.energy_consumption.empty:
-                customer_emissions = 0
-                for idx, trip in customer_data.iterrows():
-                    truck_efficiency = st.session_state.energy_consumption[
-                        st.session_state.energy_consumption['plate_number'] == trip['plate_number']
-                    ]['kwh_per_km'].mean()
-                    
-                    if not pd.isna(truck_efficiency):
-                        trip_kwh = trip['distance_km'] * truck_efficiency
-                        trip_co2 = trip_kwh * st.session_state.emission_factor
-                        customer_emissions += trip_co2
+                # Trucks without energy data contribute nothing (NaN products are skipped by sum)
+                customer_kwh = (customer_data['distance_km'] * filtered_efficiency[customer_mask]).sum()
+                customer_emissions = customer_kwh * st.session_state.emission_factor
                 
                 st.metric("Total CO2 Emissions", f"{customer_emissions:,.0f} kg CO2")
                 
@@ -217,25 +290,16 @@ with tab2:
             # Create customer report
             if st.button("Generate Customer Report"):
                 # Create detailed customer report
-                output = io.BytesIO()
-                with pd.ExcelWriter(output, engine='openpyxl') as writer:
-                    # Customer summary
-                    customer_summary = pd.DataFrame({
-                        'Customer': [selected_customer],
-                        'Period': [f"{start_date} to {end_date}"],
-                        'Total Trips': [customer_trips],
-                        'Total Distance (km)': [customer_distance],
-                        'Total Cargo (tons)': [customer_cargo],
-                        'CO2 Emissions (kg)': [customer_emissions if not st.session_state.energy_consumption.empty else 'N/A']
-                    })
-                    customer_summary.to_excel(writer, sheet_name='Customer Summary', index=False)
-                    
-                    # Trip details
-                    customer_data.to_excel(writer, sheet_name='Trip Details', index=False)
+                customer_report = customer_report_bytes(
+                    selected_customer,
+                    f"{start_date} to {end_date}",
+                    customer_data,
+                    customer_emissions if not st.session_state.energy_consumption.empty else 'N/A'
+                )
                 
                 st.download_button(
                     label=f"📥 Download {selected_customer} Emissions Report",
-                    data=output.getvalue(),
+                    data=customer_report,
                     file_name=f"{selected_customer}_emissions_report_{start_date}_{end_date}.xlsx",
                     mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
                 )
@@ -251,7 +315,7 @@ with tab3:
     with col1:
         st.write("**Trip Data Export**")
         if not filtered_data.empty:
-            csv_trips = filtered_data.to_csv(index=False)
+            csv_trips = to_csv_bytes(filtered_data)
             st.download_button(
                 label="📥 Download Trip Data (CSV)",
                 data=csv_trips,
@@ -261,7 +325,7 @@ with tab3:
         
         st.write("**Energy Consumption Export**")
         if not st.session_state.energy_consumption.empty:
-            csv_energy = st.session_state.energy_consumption.to_csv(index=False)
+            csv_energy = to_csv_bytes(st.session_state.energy_consumption)
             st.download_button(
                 label="📥 Download Energy Data (CSV)",
                 data=csv_energy,
@@ -272,7 +336,7 @@ with tab3:
     with col2:
         st.write("**Locations Export**")
         if not st.session_state.locations_data.empty:
-            csv_locations = st.session_state.locations_data.to_csv(index=False)
+            csv_locations = to_csv_bytes(st.session_state.locations_data)
             st.download_button(
                 label="📥 Download Locations (CSV)",
                 data=csv_locations,
@@ -282,7 +346,7 @@ with tab3:
         
         st.write("**Routes Export**")
         if not st.session_state.routes_data.empty:
-            csv_routes = st.session_state.routes_data.to_csv(index=False)
+            csv_routes = to_csv_bytes(st.session_state.routes_data)
             st.download_button(
                 label="📥 Download Routes (CSV)",
                 data=csv_routes,
@@ -293,20 +357,17 @@ with tab3:
     # Complete data export
     st.write("**Complete Data Export (Excel)**")
     if st.button("Generate Complete Data Export"):
-        output = io.BytesIO()
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            if not filtered_data.empty:
-                filtered_data.to_excel(writer, sheet_name='Trip Data', index=False)
-            if not st.session_state.energy_consumption.empty:
-                st.session_state.energy_consumption.to_excel(writer, sheet_name='Energy Consumption', index=False)
-            if not st.session_state.locations_data.empty:
-                st.session_state.locations_data.to_excel(writer, sheet_name='Locations', index=False)
-            if not st.session_state.routes_data.empty:
-                st.session_state.routes_data.to_excel(writer, sheet_name='Routes', index=False)
+        sheets = [
+            ('Trip Data', filtered_data),
+            ('Energy Consumption', st.session_state.energy_consumption),
+            ('Locations', st.session_state.locations_data),
+            ('Routes', st.session_state.routes_data)
+        ]
+        complete_export = stream_workbook([(name, df) for name, df in sheets if not df.empty])
         
         st.download_button(
             label="📥 Download Complete Dataset (Excel)",
-            data=output.getvalue(),
+            data=complete_export,
             file_name=f"complete_data_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
             mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
         )
@@ -315,27 +376,31 @@ with tab3:
 if not filtered_data.empty:
     st.header("📈 Report Preview")
     
-    # Charts for the selected period
+    # Charts for the selected period; one grouping pass feeds both
+    truck_summary = filtered_data.groupby('plate_number', observed=True, sort=False).agg(
+        trips=('plate_number', 'size'),
+        distance=('distance_km', 'sum')
+    ).reset_index()
     col1, col2 = st.columns(2)
     
     with col1:
         # Trips by truck
-        trips_by_truck = filtered_data['plate_number'].value_counts()
         fig_trips = px.bar(
-            x=trips_by_truck.index,
-            y=trips_by_truck.values,
+            truck_summary.sort_values('trips', ascending=False),
+            x='plate_number',
+            y='trips',
             title="Trips by Truck",
-            labels={'x': 'Truck', 'y': 'Number of Trips'}
+            labels={'plate_number': 'Truck', 'trips': 'Number of Trips'}
         )
         st.plotly_chart(fig_trips, use_container_width=True)
     
     with col2:
         # Distance by truck
-        distance_by_truck = filtered_data.groupby('plate_number')['distance_km'].sum()
         fig_distance = px.bar(
-            x=distance_by_truck.index,
-            y=distance_by_truck.values,
+            truck_summary,
+            x='plate_number',
+            y='distance',
             title="Distance by Truck",
-            labels={'x': 'Truck', 'y': 'Total Distance (km)'}
+            labels={'plate_number': 'Truck', 'distance': 'Total Distance (km)'}
         )
         st.plotly_chart(fig_distance, use_container_width=True)
@@ -1,16 +1,15 @@
 import streamlit as st
 import pandas as pd
 import json
+import sys
 from datetime import datetime
-from utils.shared_components import apply_dsv_styling, render_dsv_header
+from utils.shared_components import render_dsv_chrome
+from utils.data_processing import parse_coordinates
 
 st.set_page_config(page_title="Debug", page_icon="🔧", layout="wide")
 
-# Apply consistent DSV styling
-apply_dsv_styling()
-
-# Render DSV header
-render_dsv_header()
+# Apply consistent DSV styling and render the DSV header
+render_dsv_chrome()
 
 st.markdown("""
 <style>
@@ -22,6 +21,18 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# Row highlight per validation/health status
+STATUS_COLORS = {
+    'Error': 'background-color: #ffebee',
+    'Warning': 'background-color: #fff3e0',
+    'Success': 'background-color: #e8f5e8',
+    'OK': 'background-color: #e8f5e8'
+}
+
+def status_colors(col):
+    """CSS for a whole status column in one vectorized lookup"""
+    return col.map(STATUS_COLORS).fillna('')
+
 st.title("🔧 System Debug & Diagnostics")
 
 # System Information
@@ -37,8 +48,12 @@ with col2:
     st.metric("Session ID", str(id(st.session_state))[-8:])
 
 with col3:
-    memory_usage = sum(len(str(v)) for v in st.session_state.values() if hasattr(v, '__len__'))
-    st.metric("Memory Usage (approx)", f"{memory_usage:,} chars")
+    # Byte counts straight from pandas/the interpreter; no need to stringify every frame
+    memory_usage = sum(
+        int(v.memory_usage(deep=True).sum()) if isinstance(v, pd.DataFrame) else sys.getsizeof(v)
+        for v in st.session_state.values()
+    )
+    st.metric("Memory Usage (approx)", f"{memory_usage:,} bytes")
 
 # Data Status
 st.header("Data Status")
@@ -119,26 +134,20 @@ if not st.session_state.trips_data.empty:
             "Count": "Failed"
         })
     
-    # Check for negative values
-    if 'distance_km' in trips_df.columns:
-        negative_distances = (trips_df['distance_km'] < 0).sum()
-        if negative_distances > 0:
-            validation_results.append({
-                "Type": "Error",
-                "Table": "Trip Data",
-                "Issue": "Negative distances found",
-                "Count": negative_distances
-            })
-    
-    if 'tons_loaded' in trips_df.columns:
-        negative_tons = (trips_df['tons_loaded'] < 0).sum()
-        if negative_tons > 0:
-            validation_results.append({
-                "Type": "Error",
-                "Table": "Trip Data",
-                "Issue": "Negative cargo weights found",
-                "Count": negative_tons
-            })
+    # Check for negative values, counted for all numeric columns in one pass
+    negative_issues = {
+        'distance_km': "Negative distances found",
+        'tons_loaded': "Negative cargo weights found"
+    }
+    negative_cols = [col for col in negative_issues if col in trips_df.columns]
+    negative_counts = (trips_df[negative_cols] < 0).sum()
+    for col, negative_count in negative_counts[negative_counts > 0].items():
+        validation_results.append({
+            "Type": "Error",
+            "Table": "Trip Data",
+            "Issue": negative_issues[col],
+            "Count": negative_count
+        })
 
 # Validate energy consumption data
 if not st.session_state.energy_consumption.empty:
@@ -169,15 +178,11 @@ if not st.session_state.energy_consumption.empty:
 if not st.session_state.locations_data.empty:
     locations_df = st.session_state.locations_data
     
-    invalid_coords = 0
-    for coord in locations_df['coordinates']:
-        try:
-            if pd.notna(coord):
-                lat, lng = map(float, str(coord).split(','))
-                if not (-90 <= lat <= 90 and -180 <= lng <= 180):
-                    invalid_coords += 1
-        except:
-            invalid_coords += 1
+    # Unparseable values come back as NaN and fail the range check; blank coordinates are skipped
+    coords = locations_df['coordinates']
+    parsed = parse_coordinates(coords)
+    in_range = parsed['lat'].between(-90, 90) & parsed['lng'].between(-180, 180)
+    invalid_coords = int((coords.notna() & ~in_range).sum())
     
     if invalid_coords > 0:
         validation_results.append({
@@ -192,16 +197,7 @@ if validation_results:
     validation_df = pd.DataFrame(validation_results)
     
     # Color code by type
-    def color_type(val):
-        if val == 'Error':
-            return 'background-color: #ffebee'
-        elif val == 'Warning':
-            return 'background-color: #fff3e0'
-        elif val == 'Success':
-            return 'background-color: #e8f5e8'
-        return ''
-    
-    styled_df = validation_df.style.applymap(color_type, subset=['Type'])
+    styled_df = validation_df.style.apply(status_colors, subset=['Type'])
     st.dataframe(styled_df, use_container_width=True)
 else:
     st.success("No validation issues found!")
@@ -244,7 +240,13 @@ st.header("Performance Metrics")
 col1, col2, col3 = st.columns(3)
 
 with col1:
-    total_records = sum(len(getattr(st.session_state, key, [])) for key in ['trips_data', 'energy_consumption', 'locations_data', 'routes_data'])
+    data_frames = (
+        st.session_state.trips_data,
+        st.session_state.energy_consumption,
+        st.session_state.locations_data,
+        st.session_state.routes_data
+    )
+    total_records = sum(len(df) for df in data_frames)
     st.metric("Total Records", total_records)
 
 with col2:
@@ -262,15 +264,14 @@ health_checks = []
 
 # Check data integrity
 if not st.session_state.trips_data.empty and not st.session_state.energy_consumption.empty:
-    trip_trucks = set(st.session_state.trips_data['plate_number'].unique())
-    energy_trucks = set(st.session_state.energy_consumption['plate_number'].unique())
+    energy_trucks = st.session_state.energy_consumption['plate_number'].unique()
+    trucks_without_energy = pd.Index(st.session_state.trips_data['plate_number'].dropna().unique()).difference(energy_trucks)
     
-    trucks_without_energy = trip_trucks - energy_trucks
-    if trucks_without_energy:
+    if len(trucks_without_energy):
         health_checks.append({
             "Status": "Warning",
             "Check": "Data Integrity",
-            "Message": f"Trucks without energy data: {', '.join(trucks_without_energy)}"
+            "Message": f"Trucks without energy data: {', '.join(map(str, trucks_without_energy))}"
         })
     else:
         health_checks.append({
@@ -281,20 +282,22 @@ if not st.session_state.trips_data.empty and not st.session_state.energy_consump
 
 # Check location coverage
 if not st.session_state.trips_data.empty and not st.session_state.locations_data.empty:
-    trip_locations = set()
-    if 'from_location' in st.session_state.trips_data.columns:
-        trip_locations.update(st.session_state.trips_data['from_location'].dropna().unique())
-    if 'to_location' in st.session_state.trips_data.columns:
-        trip_locations.update(st.session_state.trips_data['to_location'].dropna().unique())
+    location_cols = [col for col in ('from_location', 'to_location') if col in st.session_state.trips_data.columns]
+    trip_locations = pd.Index([])
+    if location_cols:
+        trip_locations = pd.Index(
+            pd.concat([st.session_state.trips_data[col].astype(object) for col in location_cols], ignore_index=True)
+            .dropna().unique()
+        )
     
-    defined_locations = set(st.session_state.locations_data['location_name'].unique())
-    missing_locations = trip_locations - defined_locations
+    defined_locations = st.session_state.locations_data['location_name'].unique()
+    missing_locations = trip_locations.difference(defined_locations)
     
-    if missing_locations:
+    if len(missing_locations):
         health_checks.append({
             "Status": "Warning",
             "Check": "Location Coverage",
-            "Message": f"Locations used in trips but not defined: {', '.join(list(missing_locations)[:5])}"
+            "Message": f"Locations used in trips but not defined: {', '.join(map(str, missing_locations[:5]))}"
         })
     else:
         health_checks.append({
@@ -306,15 +309,7 @@ if not st.session_state.trips_data.empty and not st.session_state.locations_data
 # Display health checks
 if health_checks:
     health_df = pd.DataFrame(health_checks)
-    
-    def color_status(val):
-        if val == 'Warning':
-            return 'background-color: #fff3e0'
-        elif val == 'OK':
-            return 'background-color: #e8f5e8'
-        return ''
-    
-    styled_health = health_df.style.applymap(color_status, subset=['Status'])
+    styled_health = health_df.style.apply(status_colors, subset=['Status'])
     st.dataframe(styled_health, use_container_width=True)
 else:
     st.info("No health checks configured yet.")
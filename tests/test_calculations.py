@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.calculations import calculate_monthly_summary, calculate_truck_metrics
+
+# Expected values below were produced by the original groupby/per-month implementations
+
+
+@pytest.fixture
+def trips():
+    return pd.DataFrame({
+        'date': pd.to_datetime(['2025-01-05', '2025-01-20', '2025-02-03', '2025-02-10',
+                                '2025-02-11', '2025-03-01', '2025-03-02']),
+        'customer': ['ACME', 'Beta', 'ACME', 'ACME', 'Gamma', 'Beta', 'Delta'],
+        'from_location': ['A', 'A', 'B', 'A', 'C', 'B', 'C'],
+        'to_location': ['B', 'C', 'C', 'B', 'A', 'A', 'B'],
+        'tons_loaded': [10.0, 5.0, np.nan, 8.0, 2.0, 4.0, 1.0],
+        # The trip without a plate is left out of per-truck figures, as groupby did
+        'plate_number': ['T1', 'T2', 'T1', 'T3', 'T2', 'T1', None],
+        'distance_km': [100.0, 50.0, 80.0, 0.0, 30.0, 120.0, 999.0],
+    })
+
+
+@pytest.fixture
+def energy():
+    return pd.DataFrame({
+        'plate_number': ['T1', 'T1', 'T2'],
+        'period': ['2025-01', '2025-02', '2025-01'],
+        'kwh_per_km': [1.2, 1.4, 1.0],
+    })
+
+
+def test_truck_metrics_match_baseline(trips, energy):
+    metrics = calculate_truck_metrics(trips, energy, 0.5)
+
+    assert list(metrics['plate']) == ['T1', 'T2', 'T3']
+    assert list(metrics['total_trips']) == [3, 2, 1]
+    expected = {
+        'total_km': [300.0, 80.0, 0.0],
+        'kwh_per_km': [1.3, 1.0, 1.15],  # T3 has no energy data and takes the fleet average
+        'total_kwh': [390.0, 80.0, 0.0],
+        'total_tkm': [1480.0, 310.0, 0.0],
+        'kg_co2': [195.0, 40.0, 0.0],
+        'kwh_per_tkm': [390 / 1480, 80 / 310, 0.0],
+        'kg_co2_per_tkm': [195 / 1480, 40 / 310, 0.0],
+        'kg_co2_per_km': [0.65, 0.5, 0.0],
+    }
+    for col, values in expected.items():
+        assert metrics[col].tolist() == pytest.approx(values), col
+
+
+def test_truck_metrics_without_energy_data(trips):
+    metrics = calculate_truck_metrics(trips, pd.DataFrame(), 0.5)
+
+    assert metrics['total_tkm'].tolist() == pytest.approx([1480.0, 310.0, 0.0])
+    for col in ['kwh_per_km', 'total_kwh', 'kg_co2', 'kwh_per_tkm', 'kg_co2_per_tkm', 'kg_co2_per_km']:
+        assert (metrics[col] == 0).all(), col
+
+
+def test_monthly_summary_matches_baseline(trips, energy):
+    monthly = calculate_monthly_summary(trips, energy, 0.5)
+
+    assert list(monthly['year_month']) == ['2025-01', '2025-02', '2025-03']
+    assert list(monthly['trips_count']) == [2, 3, 2]
+    assert list(monthly['active_trucks']) == [2, 3, 1]
+    assert list(monthly['customers_served']) == [2, 2, 2]
+    expected = {
+        'distance_km': [150.0, 110.0, 1119.0],
+        'cargo_tons': [15.0, 10.0, 5.0],
+        'tkm': [1250.0, 60.0, 1479.0],
+        'energy_kwh': [180.0, 134.0, 156.0],
+        'emissions_kg_co2': [90.0, 67.0, 78.0],
+        'avg_efficiency_kwh_km': [1.15, 1.15, 1.3],
+        'emissions_per_tkm': [0.072, 1.117, 0.053],
+    }
+    for col, values in expected.items():
+        assert monthly[col].tolist() == pytest.approx(values), col
+
+
+def test_monthly_summary_parses_string_dates(trips, energy):
+    as_text = trips.assign(date=trips['date'].dt.strftime('%Y-%m-%d'))
+
+    pd.testing.assert_frame_equal(
+        calculate_monthly_summary(as_text, energy, 0.5),
+        calculate_monthly_summary(trips, energy, 0.5),
+    )
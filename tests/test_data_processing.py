@@ -0,0 +1,140 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import data_processing
+from utils.data_processing import (
+    calculate_trip_distances,
+    clean_trip_data,
+    merge_trip_energy_data,
+    parse_trip_dates,
+    read_csv_upload,
+)
+
+TEXT_DTYPES = {'plate_number': 'str', 'period': 'str'}
+
+
+def _buf(text):
+    return io.BytesIO(text.encode())
+
+
+@pytest.mark.skipif(data_processing.CSV_ENGINE != 'pyarrow', reason="pyarrow not installed")
+def test_arrow_path_keeps_leading_zeros(monkeypatch):
+    def no_fallback(*args, **kwargs):
+        raise AssertionError("C reader fallback should not be used")
+    monkeypatch.setattr(data_processing, '_read_csv_chunked', no_fallback)
+
+    df = read_csv_upload(_buf("plate_number,period,kwh_per_km\n00123,2025-01,1.2\n00456,2025-01,1.4\n"),
+                         dtype=TEXT_DTYPES)
+
+    assert list(df['plate_number']) == ['00123', '00456']
+    assert df['kwh_per_km'].tolist() == [1.2, 1.4]
+
+
+def test_fallback_path_keeps_leading_zeros():
+    # The short second row is rejected by the Arrow reader and read by the C reader instead
+    df = read_csv_upload(_buf("plate_number,period,kwh_per_km\n00123,2025-01,1.2\n00456,2025-01\n"),
+                         dtype=TEXT_DTYPES)
+
+    assert list(df['plate_number']) == ['00123', '00456']
+
+
+def test_both_paths_agree_on_identifiers(monkeypatch):
+    text = "plate_number,customer,distance_km\n00123,ACME,10\n,ACME,\n"
+    arrow = read_csv_upload(_buf(text), dtype={'plate_number': 'str'})
+    monkeypatch.setattr(data_processing, 'CSV_ENGINE', None)
+    c_reader = read_csv_upload(_buf(text), dtype={'plate_number': 'str'})
+
+    assert arrow['plate_number'].iloc[0] == c_reader['plate_number'].iloc[0] == '00123'
+    assert arrow['plate_number'].isna().iloc[1] and c_reader['plate_number'].isna().iloc[1]
+    assert arrow['distance_km'].isna().iloc[1] and c_reader['distance_km'].isna().iloc[1]
+
+
+def test_usecols_ignores_absent_columns():
+    df = read_csv_upload(_buf("plate_number,kwh_per_km,extra\n007,1.0,x\n"),
+                         dtype=TEXT_DTYPES, usecols={'plate_number', 'kwh_per_km', 'period'})
+
+    assert list(df.columns) == ['plate_number', 'kwh_per_km']
+    assert df['plate_number'].iloc[0] == '007'
+
+
+def test_route_distances_fill_float32_column():
+    # Importer stores distance_km as float32; routes added on the Routes page are float64
+    trips = pd.DataFrame({
+        'from_location': ['A', 'A', 'B'],
+        'to_location': ['B', 'B', 'C'],
+        'distance_km': np.array([0, 5, np.nan], dtype='float32'),
+    })
+    routes = pd.DataFrame({
+        'from_location_name': ['A', 'B'],
+        'to_location_name': ['B', 'C'],
+        'km_distance': [12.34, 7.5],
+    })
+
+    out = calculate_trip_distances(trips, routes)
+
+    assert out['distance_km'].dtype == 'float32'
+    np.testing.assert_allclose(out['distance_km'], [12.34, 5, 7.5], rtol=1e-6)
+
+
+def test_parse_trip_dates_matches_to_datetime():
+    iso = pd.Series(['2025-01-05', '2025-02-28', None])
+    # Values must match; the datetime resolution may differ between the two parsers
+    pd.testing.assert_series_equal(parse_trip_dates(iso), pd.to_datetime(iso), check_dtype=False)
+
+    # A non-template format still goes through inference, like pd.to_datetime
+    us = pd.Series(['05/02/2025', '06/03/2025'])
+    pd.testing.assert_series_equal(parse_trip_dates(us), pd.to_datetime(us), check_dtype=False)
+
+
+def test_parse_trip_dates_marks_unparseable_values():
+    parsed = parse_trip_dates(pd.Series(['2025-01-05', 'N/A', '05/02/2025']))
+
+    assert parsed.iloc[0] == pd.Timestamp('2025-01-05')
+    assert pd.isna(parsed.iloc[1])
+    assert parsed.iloc[2] == pd.Timestamp('2025-05-02')
+
+
+def test_clean_trip_data_matches_baseline():
+    raw = pd.DataFrame({
+        'date': ['2025-01-05', '2025-02-05', None, '2025-03-01'],
+        'customer': [' ACME ', 'Beta', 'ACME', None],
+        'from_location': ['A', 'A', 'B', 'C'],
+        'to_location': ['B', 'C ', 'C', 'A'],
+        'tons_loaded': ['10', 'x', '-3', '5'],
+        'distance_km': [100, None, 20, 7],
+        'plate_number': ['T1 ', ' T2', 'T1', 'T2'],
+        'truck_type': ['EV', 'EV', 'EV', 'EV'],
+    })
+
+    cleaned = clean_trip_data(raw)
+
+    assert list(cleaned.columns) == list(raw.columns)
+    assert cleaned['date'].tolist() == [pd.Timestamp('2025-01-05'), pd.Timestamp('2025-02-05')]
+    assert cleaned['customer'].astype(str).tolist() == ['ACME', 'Beta']
+    assert cleaned['to_location'].astype(str).tolist() == ['B', 'C']
+    assert cleaned['plate_number'].astype(str).tolist() == ['T1', 'T2']
+    assert cleaned['tons_loaded'].tolist() == [10.0, 0.0]
+    assert cleaned['distance_km'].tolist() == [100.0, 0.0]
+
+
+def test_merge_trip_energy_data_matches_baseline():
+    trips = pd.DataFrame({
+        'plate_number': ['T1', 'T2', 'T3', 'T1'],
+        'distance_km': [100.0, 50.0, 10.0, 80.0],
+    }, index=[10, 11, 12, 13])
+    energy = pd.DataFrame({
+        'plate_number': ['T1', 'T1', 'T2'],
+        'period': ['2025-01', '2025-02', '2025-01'],
+        'kwh_per_km': [1.2, 1.4, 1.0],
+    })
+
+    merged = merge_trip_energy_data(trips, energy)
+
+    # Same shape merge(how='left') gave: trip order kept, index reset, unmatched trucks NaN
+    assert list(merged.index) == [0, 1, 2, 3]
+    assert merged['kwh_per_km'].tolist() == pytest.approx([1.3, 1.0, np.nan, 1.3], nan_ok=True)
+    assert merged['period'].tolist()[:2] == ['2025-02', '2025-01']
+    assert pd.isna(merged['period'].iloc[2]) and merged['period'].iloc[3] == '2025-02'
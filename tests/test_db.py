@@ -0,0 +1,69 @@
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("streamlit")
+pytest.importorskip("supabase")
+
+from utils import db
+
+
+class FakeQuery:
+    """Enough of the PostgREST builder for paging: order, range and execute"""
+
+    def __init__(self, rows, max_rows, with_count, calls):
+        self.rows = rows
+        self.max_rows = max_rows
+        self.with_count = with_count
+        self.calls = calls
+        self.order_by = []
+
+    def order(self, column, desc=False):
+        self.order_by.append(column)
+        return self
+
+    def range(self, start, end):
+        self.window = (start, end)
+        return self
+
+    def execute(self):
+        self.calls.append((tuple(self.order_by), self.window))
+        start, end = self.window
+        rows = sorted(self.rows, key=lambda r: r['id'])
+        page = rows[start:min(end + 1, start + self.max_rows)]
+        return SimpleNamespace(data=page, count=len(self.rows) if self.with_count else None)
+
+
+def _fetch(n_rows, *, max_rows=db.FETCH_PAGE_SIZE, with_count=True):
+    rows = [{'id': i} for i in reversed(range(n_rows))]
+    calls = []
+    fetched = db._fetch_all_pages(lambda: FakeQuery(rows, max_rows, with_count, calls), 'id')
+    return fetched, calls
+
+
+def test_pages_are_ordered_by_the_key_column():
+    fetched, calls = _fetch(2500)
+
+    assert [r['id'] for r in fetched] == list(range(2500))
+    assert all(order == ('id',) for order, _ in calls)
+    assert [window for _, window in calls] == [(0, 999), (1000, 1999), (2000, 2999)]
+
+
+def test_server_max_rows_below_page_size_still_reads_everything():
+    fetched, calls = _fetch(2345, max_rows=300)
+
+    assert [r['id'] for r in fetched] == list(range(2345))
+    assert len(calls) == 8
+
+
+def test_small_table_takes_one_request():
+    fetched, calls = _fetch(50)
+    assert len(fetched) == 50 and len(calls) == 1
+
+    fetched, calls = _fetch(50, with_count=False)
+    assert len(fetched) == 50 and len(calls) == 1
+
+
+def test_unlimited_fetch_table_requires_key_column():
+    with pytest.raises(ValueError):
+        db.fetch_table("ev.trips")
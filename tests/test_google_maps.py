@@ -0,0 +1,35 @@
+import asyncio
+import time
+
+import pytest
+
+pytest.importorskip("streamlit")
+
+from utils.google_maps import ElementRateLimiter
+
+
+def _elapsed(limiter, *sizes):
+    async def run():
+        for n in sizes:
+            await limiter.acquire(n)
+
+    start = time.monotonic()
+    asyncio.run(run())
+    return time.monotonic() - start
+
+
+def test_full_bucket_is_spent_without_waiting():
+    assert _elapsed(ElementRateLimiter(1000), 600, 400) < 0.1
+
+
+def test_waits_for_the_elements_it_needs():
+    # 1000 elements/s: after draining the bucket, 300 more take about 0.3s to refill
+    assert 0.25 < _elapsed(ElementRateLimiter(1000), 1000, 300) < 0.6
+
+
+def test_request_larger_than_bucket_goes_out_once_full():
+    limiter = ElementRateLimiter(1000)
+
+    assert _elapsed(limiter, 1500) < 0.1
+    # The oversized call left the bucket 500 in debt; 100 more wait for 600 to refill
+    assert 0.5 < _elapsed(limiter, 100) < 0.9
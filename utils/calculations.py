@@ -18,29 +18,31 @@ def calculate_truck_metrics(trips_data: pd.DataFrame, energy_data: pd.DataFrame,
     if trips_data.empty:
         return pd.DataFrame()
     
-    # Aggregate basic trip metrics by truck
-    truck_stats = trips_data.groupby('plate_number').agg({
-        'date': 'count',  # Total trips
-        'distance_km': 'sum',  # Total distance
-        'tons_loaded': 'sum',  # Total cargo transported
-    }).rename(columns={'date': 'total_trips'})
-    
-    # Calculate ton-kilometers (freight work done) - handle data type conversion
-    def calculate_tkm(group):
-        # Convert to numeric, handling any string values
-        distance = pd.to_numeric(group['distance_km'], errors='coerce').fillna(0)
-        tons = pd.to_numeric(group['tons_loaded'], errors='coerce').fillna(0)
-        return (distance * tons).sum()
-    
-    truck_stats['total_tkm'] = (
-        trips_data.groupby('plate_number')
-        .apply(calculate_tkm, include_groups=False)
-    )
+    # Group codes per trip (-1 for a missing plate, which groupby would drop too)
+    codes, plates = pd.factorize(trips_data['plate_number'], sort=True)
+    has_plate = codes >= 0
+    codes = codes[has_plate]
+    n_trucks = len(plates)
+    
+    def truck_sums(values):
+        return np.bincount(codes, weights=values[has_plate], minlength=n_trucks)
+    
+    # Non-numeric or missing distance/cargo counts as 0
+    distance = pd.to_numeric(trips_data['distance_km'], errors='coerce').fillna(0).to_numpy(dtype='float64')
+    tons = pd.to_numeric(trips_data['tons_loaded'], errors='coerce').fillna(0).to_numpy(dtype='float64')
+    
+    # Aggregate trip metrics by truck: one C-level bincount per measure instead of pandas groupby
+    truck_stats = pd.DataFrame({
+        'total_trips': truck_sums(trips_data['date'].notna().to_numpy(dtype='float64')).astype('int64'),
+        'distance_km': truck_sums(distance),
+        'tons_loaded': truck_sums(tons),
+        'total_tkm': truck_sums(distance * tons)  # Ton-kilometers (freight work done)
+    }, index=pd.Index(plates, name='plate_number'))
     
     # Add energy efficiency data if available
     if not energy_data.empty:
         # Get average efficiency per truck
-        avg_efficiency = energy_data.groupby('plate_number')['kwh_per_km'].mean()
+        avg_efficiency = energy_data.groupby('plate_number', observed=True)['kwh_per_km'].mean()
         truck_stats = truck_stats.join(avg_efficiency, how='left')
         
         # Fill missing efficiency values with fleet average
@@ -54,22 +56,25 @@ def calculate_truck_metrics(trips_data: pd.DataFrame, energy_data: pd.DataFrame,
         truck_stats['kg_co2'] = truck_stats['total_kwh'] * emission_factor
         
         # Calculate efficiency metrics per ton-kilometer
-        truck_stats['kwh_per_tkm'] = np.where(
-            truck_stats['total_tkm'] > 0,
-            truck_stats['total_kwh'] / truck_stats['total_tkm'],
-            0
+        truck_stats['kwh_per_tkm'] = np.divide(
+            truck_stats['total_kwh'].to_numpy(dtype='float64'),
+            truck_stats['total_tkm'].to_numpy(dtype='float64'),
+            out=np.zeros(len(truck_stats)),
+            where=truck_stats['total_tkm'].to_numpy() > 0
         )
         
-        truck_stats['kg_co2_per_tkm'] = np.where(
-            truck_stats['total_tkm'] > 0,
-            truck_stats['kg_co2'] / truck_stats['total_tkm'],
-            0
+        truck_stats['kg_co2_per_tkm'] = np.divide(
+            truck_stats['kg_co2'].to_numpy(dtype='float64'),
+            truck_stats['total_tkm'].to_numpy(dtype='float64'),
+            out=np.zeros(len(truck_stats)),
+            where=truck_stats['total_tkm'].to_numpy() > 0
         )
         
-        truck_stats['kg_co2_per_km'] = np.where(
-            truck_stats['distance_km'] > 0,
-            truck_stats['kg_co2'] / truck_stats['distance_km'],
-            0
+        truck_stats['kg_co2_per_km'] = np.divide(
+            truck_stats['kg_co2'].to_numpy(dtype='float64'),
+            truck_stats['distance_km'].to_numpy(dtype='float64'),
+            out=np.zeros(len(truck_stats)),
+            where=truck_stats['distance_km'].to_numpy() > 0
         )
     else:
         # Set default values when no energy data is available
@@ -122,10 +127,8 @@ def calculate_emissions_report(trips_data: pd.DataFrame, energy_data: pd.DataFra
         'total_kwh', 'kg_co2', 'kwh_per_km', 'kg_co2_per_km', 'kg_co2_per_tkm'
     ]
     
-    emissions_report = truck_metrics[emissions_columns].copy()
-    
-    # Rename columns for better readability in reports
-    emissions_report = emissions_report.rename(columns={
+    # Rename columns for better readability in reports (rename already returns a new frame)
+    emissions_report = truck_metrics.loc[:, emissions_columns].rename(columns={
         'plate': 'truck_plate',
         'total_trips': 'trips_count',
         'total_km': 'distance_km',
@@ -185,21 +188,10 @@ def calculate_customer_emissions(trips_data: pd.DataFrame, energy_data: pd.DataF
     # Calculate emissions
     total_emissions = 0
     if not energy_data.empty:
-        for _, trip in customer_trips.iterrows():
-            # Get truck efficiency
-            truck_efficiency_data = energy_data[
-                energy_data['plate_number'] == trip['plate_number']
-            ]
-            
-            if not truck_efficiency_data.empty:
-                efficiency = truck_efficiency_data['kwh_per_km'].mean()
-                # Convert to numeric for calculation
-                distance_val = pd.to_numeric(trip['distance_km'], errors='coerce')
-                if pd.isna(distance_val):
-                    distance_val = 0
-                trip_kwh = distance_val * efficiency
-                trip_co2 = trip_kwh * emission_factor
-                total_emissions += trip_co2
+        # Average efficiency per truck, mapped onto the trips; trucks without energy data contribute nothing
+        efficiency_by_truck = energy_data.groupby('plate_number', observed=True, sort=False)['kwh_per_km'].mean()
+        trip_efficiency = customer_trips['plate_number'].map(efficiency_by_truck).astype('float64').to_numpy()
+        total_emissions = float(np.nansum(distance_numeric.to_numpy() * trip_efficiency) * emission_factor)
     
     # Calculate efficiency metrics
     emissions_per_ton = total_emissions / total_cargo if total_cargo > 0 else 0
@@ -216,6 +208,38 @@ def calculate_customer_emissions(trips_data: pd.DataFrame, energy_data: pd.DataF
         'emissions_per_km': round(emissions_per_km, 2)
     }
 
+def enrich_trips(trips_data: pd.DataFrame, energy_data: pd.DataFrame,
+                 emission_factor: float = 0.5) -> pd.DataFrame:
+    """
+    Attach per-trip energy columns once so reports can sum them instead of re-deriving them
+    
+    Args:
+        trips_data: Trip data
+        energy_data: Energy consumption data
+        emission_factor: CO2 emission factor in kg CO2/kWh
+    
+    Returns:
+        Trip data with kwh_per_km (truck mean, fleet average for trucks without energy data),
+        trip_kwh and trip_co2 columns
+    """
+    plates = trips_data['plate_number']
+    if energy_data.empty:
+        trip_efficiency = pd.Series(0.0, index=trips_data.index)
+    else:
+        avg_efficiency = energy_data.groupby('plate_number', observed=True, sort=False)['kwh_per_km'].mean()
+        trip_efficiency = (
+            plates.map(avg_efficiency).astype('float64')
+            .fillna(avg_efficiency.mean())
+            .where(plates.notna())
+        )
+    
+    trip_kwh = pd.to_numeric(trips_data['distance_km'], errors='coerce').fillna(0) * trip_efficiency
+    return trips_data.assign(
+        kwh_per_km=trip_efficiency,
+        trip_kwh=trip_kwh,
+        trip_co2=trip_kwh * emission_factor
+    )
+
 def calculate_fleet_kpis(trips_data: pd.DataFrame, energy_data: pd.DataFrame, 
                         emission_factor: float = 0.5) -> Dict:
     """
@@ -251,11 +275,12 @@ def calculate_fleet_kpis(trips_data: pd.DataFrame, energy_data: pd.DataFrame,
     fleet_avg_efficiency = 0
     
     if not energy_data.empty:
-        truck_metrics = calculate_truck_metrics(trips_data, energy_data, emission_factor)
-        if not truck_metrics.empty:
-            total_energy = truck_metrics['total_kwh'].sum()
-            total_emissions = truck_metrics['kg_co2'].sum()
-            fleet_avg_efficiency = truck_metrics['kwh_per_km'].mean()
+        # Energy straight from the per-trip columns (reused when the caller already enriched the trips)
+        if 'trip_kwh' not in trips_data.columns:
+            trips_data = enrich_trips(trips_data, energy_data, emission_factor)
+        total_energy = float(trips_data['trip_kwh'].sum())
+        total_emissions = total_energy * emission_factor
+        fleet_avg_efficiency = trips_data.groupby('plate_number', observed=True, sort=False)['kwh_per_km'].first().mean()
     
     # Efficiency ratios
     energy_per_tkm = total_energy / total_tkm if total_tkm > 0 else 0
@@ -296,34 +321,68 @@ def calculate_monthly_summary(trips_data: pd.DataFrame, energy_data: pd.DataFram
     if trips_data.empty or 'date' not in trips_data.columns:
         return pd.DataFrame()
     
-    # Ensure date column is datetime
-    trips_data = trips_data.copy()
-    trips_data['date'] = pd.to_datetime(trips_data['date'])
-    trips_data['year_month'] = trips_data['date'].dt.to_period('M')
+    # Imported trips already hold datetime64; strings try the template format (YYYY-MM-DD) first
+    dates = trips_data['date']
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        parsed = pd.to_datetime(dates, format='%Y-%m-%d', errors='coerce', cache=True)
+        # Other formats fall back to inference, as before
+        dates = parsed if not (parsed.isna() & dates.notna()).any() else pd.to_datetime(dates)
+    
+    # Per-trip energy (reused when the caller already enriched the trips)
+    if 'trip_kwh' not in trips_data.columns:
+        trips_data = enrich_trips(trips_data, energy_data, emission_factor)
+    
+    # Per-trip ton-kilometers and month key, computed once for every month
+    monthly_trips = trips_data.assign(
+        year_month=dates.dt.to_period('M'),
+        _tkm=trips_data['distance_km'] * trips_data['tons_loaded']
+    )
     
-    # Group by month and calculate metrics
-    monthly_metrics = []
+    # All monthly totals from one groupby instead of a fleet KPI run per month
+    aggregations = {
+        'trips_count': ('date', 'size'),
+        'distance_km': ('distance_km', 'sum'),
+        'cargo_tons': ('tons_loaded', 'sum'),
+        'tkm': ('_tkm', 'sum'),
+        'active_trucks': ('plate_number', 'nunique'),
+        'energy_kwh': ('trip_kwh', 'sum')
+    }
+    if 'customer' in monthly_trips.columns:
+        aggregations['customers_served'] = ('customer', 'nunique')
+    monthly = monthly_trips.groupby('year_month').agg(**aggregations)
     
-    for period, month_data in trips_data.groupby('year_month'):
-        fleet_kpis = calculate_fleet_kpis(month_data, energy_data, emission_factor)
-        
-        monthly_summary = {
-            'year_month': str(period),
-            'trips_count': fleet_kpis.get('total_trips', 0),
-            'distance_km': fleet_kpis.get('total_distance_km', 0),
-            'cargo_tons': fleet_kpis.get('total_cargo_tons', 0),
-            'tkm': fleet_kpis.get('total_tkm', 0),
-            'active_trucks': fleet_kpis.get('active_trucks', 0),
-            'customers_served': fleet_kpis.get('unique_customers', 0),
-            'energy_kwh': fleet_kpis.get('total_energy_kwh', 0),
-            'emissions_kg_co2': fleet_kpis.get('total_emissions_kg', 0),
-            'avg_efficiency_kwh_km': fleet_kpis.get('fleet_avg_efficiency_kwh_km', 0),
-            'emissions_per_tkm': fleet_kpis.get('emissions_per_tkm', 0)
-        }
-        
-        monthly_metrics.append(monthly_summary)
+    if monthly.empty:
+        return pd.DataFrame()
+    
+    if 'customers_served' not in monthly.columns:
+        monthly['customers_served'] = 0
     
-    return pd.DataFrame(monthly_metrics)
+    # Fleet average efficiency counts each active truck once per month
+    monthly['avg_efficiency_kwh_km'] = (
+        monthly_trips.groupby(['year_month', 'plate_number'], observed=True)['kwh_per_km'].first()
+        .groupby(level='year_month').mean()
+    )
+    monthly['avg_efficiency_kwh_km'] = monthly['avg_efficiency_kwh_km'].fillna(0)
+    
+    monthly['emissions_kg_co2'] = monthly['energy_kwh'] * emission_factor
+    monthly['emissions_per_tkm'] = np.divide(
+        monthly['emissions_kg_co2'].to_numpy(dtype='float64'),
+        monthly['tkm'].to_numpy(dtype='float64'),
+        out=np.zeros(len(monthly)),
+        where=monthly['tkm'].to_numpy() > 0
+    )
+    
+    monthly = monthly.round({
+        'distance_km': 2, 'cargo_tons': 2, 'tkm': 2, 'energy_kwh': 2,
+        'emissions_kg_co2': 2, 'avg_efficiency_kwh_km': 3, 'emissions_per_tkm': 3
+    }).reset_index()
+    monthly['year_month'] = monthly['year_month'].astype(str)
+    
+    return monthly[[
+        'year_month', 'trips_count', 'distance_km', 'cargo_tons', 'tkm',
+        'active_trucks', 'customers_served', 'energy_kwh', 'emissions_kg_co2',
+        'avg_efficiency_kwh_km', 'emissions_per_tkm'
+    ]]
 
 def calculate_route_efficiency(trips_data: pd.DataFrame, routes_data: pd.DataFrame) -> pd.DataFrame:
     """
@@ -344,7 +403,7 @@ def calculate_route_efficiency(trips_data: pd.DataFrame, routes_data: pd.DataFra
     trips_data['route'] = trips_data['from_location'].astype(str) + ' → ' + trips_data['to_location'].astype(str)
     
     # Group by route
-    route_stats = trips_data.groupby(['from_location', 'to_location']).agg({
+    route_stats = trips_data.groupby(['from_location', 'to_location'], observed=True).agg({
         'date': 'count',  # Trip frequency
         'tons_loaded': ['sum', 'mean'],  # Total and average cargo
         'distance_km': 'first',  # Distance (should be same for all trips on route)
@@ -385,12 +444,14 @@ def validate_calculation_inputs(trips_data: pd.DataFrame, energy_data: pd.DataFr
             elif trips_data[col].isnull().any():
                 errors.append(f"Null values found in trip data column: {col}")
         
-        # Check for negative values
-        if 'distance_km' in trips_data.columns and (trips_data['distance_km'] < 0).any():
-            errors.append("Negative distances found in trip data")
-        
-        if 'tons_loaded' in trips_data.columns and (trips_data['tons_loaded'] < 0).any():
-            errors.append("Negative cargo weights found in trip data")
+        # Check for negative values in one pass over the numeric columns
+        negative_messages = {
+            'distance_km': "Negative distances found in trip data",
+            'tons_loaded': "Negative cargo weights found in trip data"
+        }
+        negative_cols = [col for col in negative_messages if col in trips_data.columns]
+        has_negative = (trips_data[negative_cols] < 0).any()
+        errors.extend(negative_messages[col] for col in negative_cols if has_negative[col])
     
     # Validate energy data
     if not energy_data.empty:
@@ -412,12 +473,10 @@ def validate_calculation_inputs(trips_data: pd.DataFrame, energy_data: pd.DataFr
     
     # Check data consistency
     if not trips_data.empty and not energy_data.empty:
-        trip_trucks = set(trips_data['plate_number'].unique())
-        energy_trucks = set(energy_data['plate_number'].unique())
-        
-        missing_energy = trip_trucks - energy_trucks
-        if missing_energy:
-            errors.append(f"Missing energy data for trucks: {', '.join(missing_energy)}")
+        trip_trucks = pd.Index(trips_data['plate_number'].dropna().unique())
+        missing_energy = trip_trucks.difference(energy_data['plate_number'].unique())
+        if len(missing_energy):
+            errors.append(f"Missing energy data for trucks: {', '.join(map(str, missing_energy))}")
     
     return errors
 
@@ -452,27 +511,27 @@ def benchmark_truck_performance(truck_metrics: pd.DataFrame) -> pd.DataFrame:
     
     benchmarked = truck_metrics.copy()
     
-    # Calculate fleet averages for benchmarking
-    fleet_avg_efficiency = truck_metrics['kwh_per_km'].mean()
-    fleet_avg_emissions_per_km = truck_metrics['kg_co2_per_km'].mean()
-    fleet_avg_emissions_per_tkm = truck_metrics['kg_co2_per_tkm'].mean()
-    
-    # Calculate performance vs fleet average (percentage difference)
-    benchmarked['efficiency_vs_fleet'] = (
-        (truck_metrics['kwh_per_km'] - fleet_avg_efficiency) / fleet_avg_efficiency * 100
-    ).round(1)
-    
-    benchmarked['emissions_per_km_vs_fleet'] = (
-        (truck_metrics['kg_co2_per_km'] - fleet_avg_emissions_per_km) / fleet_avg_emissions_per_km * 100
-    ).round(1)
-    
-    benchmarked['emissions_per_tkm_vs_fleet'] = (
-        (truck_metrics['kg_co2_per_tkm'] - fleet_avg_emissions_per_tkm) / fleet_avg_emissions_per_tkm * 100
-    ).round(1)
+    # Performance vs fleet average (percentage difference), all three metrics in one frame operation
+    benchmark_columns = {
+        'kwh_per_km': 'efficiency_vs_fleet',
+        'kg_co2_per_km': 'emissions_per_km_vs_fleet',
+        'kg_co2_per_tkm': 'emissions_per_tkm_vs_fleet'
+    }
+    metrics = truck_metrics[list(benchmark_columns)]
+    fleet_averages = metrics.mean()
+    vs_fleet = ((metrics - fleet_averages) / fleet_averages * 100).round(1)
+    for metric, column in benchmark_columns.items():
+        benchmarked[column] = vs_fleet[metric]
     
     # Add performance categories
-    benchmarked['efficiency_category'] = benchmarked['efficiency_vs_fleet'].apply(
-        lambda x: 'Excellent' if x < -10 else 'Good' if x < 0 else 'Average' if x < 10 else 'Needs Improvement'
+    efficiency_vs_fleet = benchmarked['efficiency_vs_fleet'].to_numpy()
+    benchmarked['efficiency_category'] = pd.Categorical(
+        np.select(
+            [efficiency_vs_fleet < -10, efficiency_vs_fleet < 0, efficiency_vs_fleet < 10],
+            ['Excellent', 'Good', 'Average'],
+            default='Needs Improvement'
+        ),
+        categories=['Excellent', 'Good', 'Average', 'Needs Improvement']
     )
     
     return benchmarked
@@ -1,65 +1,133 @@
 import pandas as pd
 import numpy as np
 from datetime import datetime
+from utils.calculations import calculate_truck_metrics
+
+# Multithreaded Arrow CSV reader when pyarrow is importable (it ships with Streamlit)
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    CSV_ENGINE = 'pyarrow'
+except Exception:
+    CSV_ENGINE = None
+
+CSV_CHUNK_ROWS = 100_000
+
+# Arrow-backed strings: C-level str ops and compact buffers (pyarrow ships with Streamlit)
+TEXT_DTYPE = 'string[pyarrow]'
+
+def _read_csv_chunked(buf, dtype=None, usecols=None):
+    """Read a CSV in fixed-size chunks so type inference works on bounded blocks."""
+    chunks = list(pd.read_csv(buf, chunksize=CSV_CHUNK_ROWS, dtype=dtype, usecols=usecols))
+    return chunks[0] if len(chunks) == 1 else pd.concat(chunks, ignore_index=True)
+
+def _read_csv_arrow(buf, dtype=None, usecols=None):
+    """
+    Arrow CSV read with text dtypes passed as column types, so identifiers like "00123"
+    are never inferred as integers first (pandas' pyarrow engine only casts afterwards)
+    """
+    text_types = {c: pa.string() for c, t in (dtype or {}).items() if t == 'str'}
+    table = pa_csv.read_csv(buf, convert_options=pa_csv.ConvertOptions(
+        column_types=text_types,
+        include_columns=list(usecols or []),
+        strings_can_be_null=True
+    ))
+    # All-blank columns come back as Arrow nulls; read them as float NaN like the C reader
+    schema = pa.schema([f.with_type(pa.float64()) if pa.types.is_null(f.type) else f for f in table.schema])
+    return table.cast(schema).to_pandas()
+
+def read_csv_upload(buf, dtype=None, usecols=None):
+    """
+    Parse an uploaded CSV buffer: Arrow reader first; files it rejects (ragged rows, odd quoting)
+    go through the C reader. usecols names absent from the header are ignored.
+    """
+    if usecols is not None:
+        # Resolve wanted names against the header so absent optional columns don't fail the read
+        header = pd.read_csv(buf, nrows=0).columns
+        buf.seek(0)
+        usecols = [c for c in header if c in usecols]
+    if CSV_ENGINE == 'pyarrow' and usecols != []:
+        try:
+            return _read_csv_arrow(buf, dtype=dtype, usecols=usecols)
+        except ValueError:
+            buf.seek(0)
+    return _read_csv_chunked(buf, dtype=dtype, usecols=usecols)
+
+def parse_trip_dates(dates):
+    """
+    Parse trip dates, trying the template format (YYYY-MM-DD) first and inferring only the misses
+    """
+    # Excel uploads usually arrive already typed
+    if pd.api.types.is_datetime64_any_dtype(dates):
+        return dates
+    parsed = pd.to_datetime(dates, format='%Y-%m-%d', errors='coerce', cache=True)
+    retry = parsed.isna() & dates.notna()
+    if retry.any():
+        # Values without a digit (e.g. "N/A") can't be dates; keep them off the per-element inference path
+        retry[retry] = dates[retry].astype(str).str.contains(r'\d', regex=True).to_numpy()
+        if retry.any():
+            parsed[retry] = pd.to_datetime(dates[retry], errors='coerce', cache=True)
+    return parsed
 
 def clean_trip_data(df):
     """
     Clean and validate trip data
     """
-    cleaned_df = df.copy()
+    # Work column by column; the input is never copied as a whole
+    columns = {col: df[col] for col in df.columns}
     
-    # Convert date column to datetime
-    try:
-        cleaned_df['date'] = pd.to_datetime(cleaned_df['date'])
-    except:
-        pass
+    # Convert date column to datetime; unparseable dates become NaT and are dropped below
+    if 'date' in columns:
+        columns['date'] = parse_trip_dates(columns['date'])
     
-    # Remove rows with missing essential data
+    # Remove rows with missing essential data, using one combined mask
     essential_columns = ['date', 'customer', 'from_location', 'to_location', 'plate_number']
-    available_essential = [col for col in essential_columns if col in cleaned_df.columns]
-    cleaned_df = cleaned_df.dropna(subset=available_essential)
+    available_essential = [col for col in essential_columns if col in columns]
+    if available_essential:
+        keep = np.logical_and.reduce([columns[col].notna().to_numpy() for col in available_essential])
+        if not keep.all():
+            columns = {col: values[keep] for col, values in columns.items()}
     
     # Clean numeric columns
     numeric_columns = ['tons_loaded', 'distance_km']
     for col in numeric_columns:
-        if col in cleaned_df.columns:
-            # Convert to numeric, replacing non-numeric values with 0
-            cleaned_df[col] = pd.to_numeric(cleaned_df[col], errors='coerce').fillna(0)
-            # Remove negative values
-            cleaned_df[col] = cleaned_df[col].clip(lower=0)
+        if col in columns:
+            # Non-numeric values become 0 and negative values are clipped to 0
+            columns[col] = pd.to_numeric(columns[col], errors='coerce').fillna(0).clip(lower=0)
     
-    # Clean text columns
+    # Clean text columns; stripped as Arrow strings, stored as category like the importer does
     text_columns = ['customer', 'from_location', 'to_location', 'truck_type', 'plate_number']
     for col in text_columns:
-        if col in cleaned_df.columns:
-            cleaned_df[col] = cleaned_df[col].astype(str).str.strip()
+        if col in columns:
+            columns[col] = columns[col].astype(TEXT_DTYPE).str.strip().astype('category')
     
-    return cleaned_df
+    return pd.DataFrame(columns, copy=False)
 
 def clean_energy_data(df):
     """
     Clean and validate energy consumption data
     """
-    cleaned_df = df.copy()
+    columns = {col: df[col] for col in df.columns}
+    
+    # Clean plate numbers; missing ones stay missing and are dropped below
+    if 'plate_number' in columns:
+        columns['plate_number'] = columns['plate_number'].astype(TEXT_DTYPE).str.strip()
     
-    # Clean plate numbers
-    if 'plate_number' in cleaned_df.columns:
-        cleaned_df['plate_number'] = cleaned_df['plate_number'].astype(str).str.strip()
+    # Clean period format
+    if 'period' in columns:
+        columns['period'] = columns['period'].astype(TEXT_DTYPE).str.strip()
     
     # Validate and clean kWh/km values
-    if 'kwh_per_km' in cleaned_df.columns:
-        cleaned_df['kwh_per_km'] = pd.to_numeric(cleaned_df['kwh_per_km'], errors='coerce')
-        # Remove unrealistic values (negative or extremely high)
-        cleaned_df = cleaned_df[
-            (cleaned_df['kwh_per_km'] >= 0.1) & 
-            (cleaned_df['kwh_per_km'] <= 10.0)
-        ]
+    if 'kwh_per_km' in columns:
+        columns['kwh_per_km'] = pd.to_numeric(columns['kwh_per_km'], errors='coerce')
     
-    # Clean period format
-    if 'period' in cleaned_df.columns:
-        cleaned_df['period'] = cleaned_df['period'].astype(str).str.strip()
+    # One row selection drops missing values and unrealistic (negative or extremely high) kWh/km
+    cleaned_df = pd.DataFrame(columns, copy=False)
+    keep = cleaned_df.notna().all(axis=1)
+    if 'kwh_per_km' in columns:
+        keep &= cleaned_df['kwh_per_km'].between(0.1, 10.0)
     
-    return cleaned_df.dropna()
+    return cleaned_df[keep]
 
 def merge_trip_energy_data(trips_df, energy_df):
     """
@@ -68,20 +136,21 @@ def merge_trip_energy_data(trips_df, energy_df):
     if trips_df.empty or energy_df.empty:
         return trips_df
     
-    # Get the most recent energy data for each truck
-    latest_energy = energy_df.groupby('plate_number').agg({
-        'kwh_per_km': 'mean',  # Average efficiency for the truck
-        'period': 'max'        # Most recent period
-    }).reset_index()
-    
-    # Merge with trip data
-    merged_df = trips_df.merge(
-        latest_energy,
-        left_on='plate_number',
-        right_on='plate_number',
-        how='left'
+    # Get the most recent energy data for each truck (period compared as text)
+    latest_energy = energy_df.assign(period=energy_df['period'].astype(object)).groupby(
+        'plate_number', observed=True, sort=False
+    ).agg(
+        kwh_per_km=('kwh_per_km', 'mean'),  # Average efficiency for the truck
+        period=('period', 'max')            # Most recent period
     )
     
+    # Attach to trips by plate lookup rather than a full merge; the index is reset as merge did
+    plates = trips_df['plate_number']
+    merged_df = trips_df.assign(
+        kwh_per_km=plates.map(latest_energy['kwh_per_km']).astype('float64'),
+        period=plates.map(latest_energy['period']).astype(object)
+    ).reset_index(drop=True)
+    
     return merged_df
 
 def calculate_trip_distances(trips_df, routes_df):
@@ -93,107 +162,42 @@ def calculate_trip_distances(trips_df, routes_df):
     
     updated_trips = trips_df.copy()
     
-    # Create a route lookup dictionary
-    route_lookup = {}
-    for idx, route in routes_df.iterrows():
-        key = (route['from_location_name'], route['to_location_name'])
-        route_lookup[key] = route['km_distance']
-    
-    # Update distances where missing or zero
-    for idx, trip in updated_trips.iterrows():
-        if pd.isna(trip.get('distance_km', 0)) or trip.get('distance_km', 0) == 0:
-            route_key = (trip['from_location'], trip['to_location'])
-            if route_key in route_lookup:
-                updated_trips.loc[idx, 'distance_km'] = route_lookup[route_key]
+    # Route distances keyed by (from, to); the last duplicate wins, as with a dict lookup
+    routes = routes_df.drop_duplicates(['from_location_name', 'to_location_name'], keep='last')
+    route_lookup = pd.Series(
+        routes['km_distance'].to_numpy(),
+        index=pd.MultiIndex.from_arrays([
+            routes['from_location_name'].astype(object),
+            routes['to_location_name'].astype(object)
+        ])
+    )
+    trip_keys = pd.MultiIndex.from_arrays([
+        updated_trips['from_location'].astype(object),
+        updated_trips['to_location'].astype(object)
+    ])
+    route_distance = route_lookup.reindex(trip_keys).to_numpy()
+    
+    # Update distances where missing or zero, in one assignment
+    if 'distance_km' in updated_trips.columns:
+        current = updated_trips['distance_km']
+        needs_route = (current.isna() | (current == 0)).to_numpy()
+    else:
+        needs_route = np.ones(len(updated_trips), dtype=bool)
+    needs_route = needs_route & pd.notna(route_distance)
+    if needs_route.any():
+        values = route_distance[needs_route]
+        # Imported trips store distance_km as float32; pandas won't set float64 arrays into it
+        if 'distance_km' in updated_trips.columns and pd.api.types.is_float_dtype(updated_trips['distance_km']):
+            values = values.astype(updated_trips['distance_km'].dtype)
+        updated_trips.loc[needs_route, 'distance_km'] = values
     
     return updated_trips
 
 def aggregate_truck_performance(trips_df, energy_df, emission_factor=0.5):
     """
-    Aggregate performance metrics by truck
+    Aggregate performance metrics by truck (same figures as calculate_truck_metrics)
     """
-    if trips_df.empty:
-        return pd.DataFrame()
-    
-    # Aggregate trip data by truck
-    truck_aggregates = trips_df.groupby('plate_number').agg({
-        'date': 'count',  # Total trips
-        'distance_km': 'sum',  # Total distance
-        'tons_loaded': 'sum'   # Total cargo
-    }).rename(columns={'date': 'total_trips'})
-    
-    # Calculate ton-kilometers
-    if 'distance_km' in trips_df.columns and 'tons_loaded' in trips_df.columns:
-        truck_aggregates['total_tkm'] = (
-            trips_df.groupby('plate_number')
-            .apply(lambda x: (x['distance_km'] * x['tons_loaded']).sum())
-        )
-    else:
-        truck_aggregates['total_tkm'] = 0
-    
-    # Add energy efficiency data
-    if not energy_df.empty:
-        avg_efficiency = energy_df.groupby('plate_number')['kwh_per_km'].mean()
-        truck_aggregates = truck_aggregates.join(avg_efficiency, how='left')
-        
-        # Calculate total energy consumption
-        truck_aggregates['total_kwh'] = (
-            truck_aggregates['distance_km'] * truck_aggregates['kwh_per_km']
-        ).fillna(0)
-        
-        # Calculate emissions
-        truck_aggregates['kg_co2'] = truck_aggregates['total_kwh'] * emission_factor
-        
-        # Calculate efficiency metrics
-        truck_aggregates['kwh_per_tkm'] = np.where(
-            truck_aggregates['total_tkm'] > 0,
-            truck_aggregates['total_kwh'] / truck_aggregates['total_tkm'],
-            0
-        )
-        
-        truck_aggregates['kg_co2_per_tkm'] = np.where(
-            truck_aggregates['total_tkm'] > 0,
-            truck_aggregates['kg_co2'] / truck_aggregates['total_tkm'],
-            0
-        )
-        
-        truck_aggregates['kg_co2_per_km'] = np.where(
-            truck_aggregates['distance_km'] > 0,
-            truck_aggregates['kg_co2'] / truck_aggregates['distance_km'],
-            0
-        )
-    else:
-        # Set default values when no energy data is available
-        for col in ['kwh_per_km', 'total_kwh', 'kg_co2', 'kwh_per_tkm', 'kg_co2_per_tkm', 'kg_co2_per_km']:
-            truck_aggregates[col] = 0
-    
-    # Reset index to make plate_number a column
-    truck_aggregates = truck_aggregates.reset_index()
-    
-    # Add make column (placeholder for now)
-    truck_aggregates['make'] = 'Electric Truck'
-    
-    # Reorder columns
-    column_order = [
-        'plate_number', 'make', 'total_trips', 'distance_km', 'kwh_per_km',
-        'total_kwh', 'total_tkm', 'kg_co2', 'kwh_per_tkm', 
-        'kg_co2_per_tkm', 'kg_co2_per_km'
-    ]
-    
-    # Rename columns to match expected format
-    truck_aggregates = truck_aggregates.rename(columns={
-        'plate_number': 'plate',
-        'distance_km': 'total_km'
-    })
-    
-    # Ensure all expected columns exist
-    for col in column_order:
-        col_name = col if col != 'plate_number' else 'plate'
-        col_name = col_name if col_name != 'distance_km' else 'total_km'
-        if col_name not in truck_aggregates.columns:
-            truck_aggregates[col_name] = 0
-    
-    return truck_aggregates
+    return calculate_truck_metrics(trips_df, energy_df, emission_factor)
 
 def validate_coordinates(coord_string):
     """
@@ -223,3 +227,13 @@ def format_coordinates(coord_string):
         return f"{lat:.6f},{lng:.6f}"
     except:
         return coord_string
+
+def parse_coordinates(coords):
+    """
+    Split "lat,lng" strings into float32 lat/lng columns (NaN where unparseable)
+    """
+    parts = coords.astype(str).str.partition(',')
+    return pd.DataFrame({
+        'lat': pd.to_numeric(parts[0].str.strip(), errors='coerce').astype('float32'),
+        'lng': pd.to_numeric(parts[2].str.strip(), errors='coerce').astype('float32')
+    }, index=coords.index)
@@ -2,11 +2,37 @@
 from __future__ import annotations
 
 import os
-from typing import Any, Dict, Iterable, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
 
+import httpx
 import streamlit as st
 from supabase import Client, create_client
 
+try:
+    from supabase import ClientOptions
+except ImportError:  # very old supabase-py without client options
+    ClientOptions = None
+
+# Connection pool shared by every rerun/session through the cached client
+SUPABASE_TIMEOUT_S = 20
+SUPABASE_POOL_LIMITS = httpx.Limits(
+    max_connections=60,
+    max_keepalive_connections=40,
+    keepalive_expiry=60,
+)
+
+# PostgREST caps a response at 1000 rows by default, so unlimited reads page in this size
+FETCH_PAGE_SIZE = 1000
+# Full-table pulls change slowly, so one canonical copy per (table, select) is kept longer
+FULL_FETCH_TTL_S = 300
+# IDs per `in` filter on delete; keeps the request URL well under server limits
+DELETE_CHUNK_SIZE = 500
+# Rows per insert/upsert request; keeps payloads under PostgREST body limits
+WRITE_CHUNK_SIZE = 1000
+# Concurrent write requests against the pooled client
+DB_MAX_WORKERS = 4
+
 
 # -----------------------------
 # Internal helpers
@@ -28,6 +54,30 @@ def _get_secret(name: str) -> Optional[str]:
     return None
 
 
+def _fetch_all_pages(build_query: Callable[[], Any], key_column: str) -> List[Dict[str, Any]]:
+    """
+    Run a select page by page with .range() until every row has come back.
+    The query is rebuilt for every page so range params never accumulate.
+    Every page is ordered by the unique `key_column` (after any order the builder
+    already set), so .range() windows neither overlap nor skip rows.
+    When the builder asks for count="exact", paging stops once that many rows are in,
+    so a server max-rows below FETCH_PAGE_SIZE can't truncate the pull; otherwise a
+    short page ends it. The next offset follows the rows actually returned.
+    """
+    rows: List[Dict[str, Any]] = []
+    start = 0
+    while True:
+        q = build_query().order(key_column)
+        resp = q.range(start, start + FETCH_PAGE_SIZE - 1).execute()
+        page = resp.data or []
+        rows.extend(page)
+        total = getattr(resp, "count", None)
+        done = len(rows) >= total if total is not None else len(page) < FETCH_PAGE_SIZE
+        if done or not page:
+            return rows
+        start += len(page)
+
+
 def _require_creds() -> tuple[str, str]:
     url = _get_secret("SUPABASE_URL")
     key = _get_secret("SUPABASE_ANON_KEY")
@@ -48,13 +98,51 @@ def get_supabase() -> Client:
     Returns a cached Supabase client. Safe to call many times.
     """
     url, key = _require_creds()
-    return create_client(url, key)
+    if ClientOptions is None:
+        return create_client(url, key)
+
+    options = ClientOptions(
+        postgrest_client_timeout=SUPABASE_TIMEOUT_S,
+        storage_client_timeout=SUPABASE_TIMEOUT_S,
+    )
+    # Newer supabase-py accepts a caller-owned httpx client with tuned pool limits
+    if hasattr(options, "httpx_client"):
+        options.httpx_client = httpx.Client(limits=SUPABASE_POOL_LIMITS, timeout=SUPABASE_TIMEOUT_S)
+    return create_client(url, key, options=options)
 
 
 # -----------------------------
 # Convenience data helpers
 # -----------------------------
+@st.cache_data(ttl=FULL_FETCH_TTL_S, show_spinner=False)
+def _fetch_full(table_name: str, select: str, key_column: str) -> List[Dict[str, Any]]:
+    """
+    Every row of a table for one column set, paged past the 1000-row response cap.
+    Shared by all unlimited fetch_table calls, whatever ordering they ask for.
+    Pages are ordered by the unique `key_column`; without a stable order Postgres
+    may return overlapping .range() windows, duplicating some rows and skipping others.
+    """
+    sb = get_supabase()
+    return _fetch_all_pages(lambda: sb.table(table_name).select(select, count="exact"), key_column)
+
+
 @st.cache_data(ttl=60, show_spinner=False)
+def _fetch_head(
+    table_name: str,
+    select: str,
+    limit: int,
+    order_by: Optional[str],
+    desc: bool,
+) -> List[Dict[str, Any]]:
+    """
+    First `limit` rows straight from the server; small probes don't pull the whole table.
+    """
+    q = get_supabase().table(table_name).select(select)
+    if order_by:
+        q = q.order(order_by, desc=desc)
+    return q.limit(limit).execute().data or []
+
+
 def fetch_table(
     table_name: str,
     *,
@@ -62,19 +150,26 @@ def fetch_table(
     limit: Optional[int] = None,
     order_by: Optional[str] = None,
     desc: bool = False,
+    key_column: Optional[str] = None,
 ) -> List[Dict[str, Any]]:
     """
     Fetch all rows from a table (optionally limited and ordered).
-    Cached for 60s to avoid hammering the DB on every rerun.
+    Pass a narrower `select` to pull only the columns you need.
+    Unlimited reads share one cached pull per (table, select) for FULL_FETCH_TTL_S
+    and are ordered in memory; limited reads go to the server, cached for 60s.
+    `key_column` is the table's unique key, used to page unlimited reads deterministically;
+    unlimited reads require it.
     """
-    sb = get_supabase()
-    q = sb.table(table_name).select(select)
-    if order_by:
-        q = q.order(order_by, desc=desc)
     if limit:
-        q = q.limit(limit)
-    resp = q.execute()
-    return resp.data or []
+        return _fetch_head(table_name, select, limit, order_by, desc)
+    if not key_column:
+        raise ValueError(f"fetch_table({table_name!r}) without a limit needs key_column, the table's unique key")
+
+    rows = _fetch_full(table_name, select, key_column)
+    if order_by:
+        # Postgres default null placement: last ascending, first descending
+        rows.sort(key=lambda r: (r.get(order_by) is None, r.get(order_by)), reverse=desc)
+    return rows
 
 
 @st.cache_data(ttl=60, show_spinner=False)
@@ -100,15 +195,15 @@ def fetch_table_where(
     sb = get_supabase()
     q = sb.table(table_name).select(select)
 
-    for d, fn in [
-        (eq, "eq"),
-        (gte, "gte"),
-        (lte, "lte"),
-        (ilike, "ilike"),
-    ]:
-        if d:
-            for k, v in d.items():
-                q = getattr(q, fn)(k, v)
+    # Direct builder calls; each one just appends a query param to the same request
+    for k, v in (eq or {}).items():
+        q = q.eq(k, v)
+    for k, v in (gte or {}).items():
+        q = q.gte(k, v)
+    for k, v in (lte or {}).items():
+        q = q.lte(k, v)
+    for k, v in (ilike or {}).items():
+        q = q.ilike(k, v)
 
     if order_by:
         q = q.order(order_by, desc=desc)
@@ -119,28 +214,57 @@ def fetch_table_where(
     return resp.data or []
 
 
-def insert_rows(table_name: str, rows: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+def _write_chunked(
+    table_name: str,
+    method: str,
+    rows: List[Dict[str, Any]],
+    return_rows: bool,
+) -> List[Dict[str, Any]]:
+    """
+    Send insert/upsert payloads in WRITE_CHUNK_SIZE pieces, in order.
+    With return_rows=False the server skips echoing the written rows back.
+    """
+    sb = get_supabase()
+    returning = "representation" if return_rows else "minimal"
+    written: List[Dict[str, Any]] = []
+    for i in range(0, len(rows), WRITE_CHUNK_SIZE):
+        query = getattr(sb.table(table_name), method)(rows[i:i + WRITE_CHUNK_SIZE], returning=returning)
+        resp = query.execute()
+        if return_rows:
+            written.extend(resp.data or [])
+    return written
+
+
+def insert_rows(
+    table_name: str,
+    rows: Iterable[Dict[str, Any]],
+    *,
+    return_rows: bool = False,
+) -> List[Dict[str, Any]]:
     """
-    Insert one or many rows. Returns inserted rows (if enabled) or empty list.
+    Insert one or many rows, WRITE_CHUNK_SIZE per request.
+    Returns inserted rows when return_rows=True, otherwise an empty list.
     """
     rows = list(rows)
     if not rows:
         return []
-    sb = get_supabase()
-    resp = sb.table(table_name).insert(rows).execute()
-    return resp.data or []
+    return _write_chunked(table_name, "insert", rows, return_rows)
 
 
-def upsert_rows(table_name: str, rows: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+def upsert_rows(
+    table_name: str,
+    rows: Iterable[Dict[str, Any]],
+    *,
+    return_rows: bool = False,
+) -> List[Dict[str, Any]]:
     """
     Upsert one or many rows (requires a unique constraint or primary key on the table).
+    Sent WRITE_CHUNK_SIZE per request; returns upserted rows only when return_rows=True.
     """
     rows = list(rows)
     if not rows:
         return []
-    sb = get_supabase()
-    resp = sb.table(table_name).upsert(rows).execute()
-    return resp.data or []
+    return _write_chunked(table_name, "upsert", rows, return_rows)
 
 
 def delete_rows_by_ids(
@@ -150,16 +274,30 @@ def delete_rows_by_ids(
 ) -> int:
     """
     Delete rows by a list of IDs from `id_column`.
+    IDs go out in chunks (long `in` filters overflow the request URL), a few at a time,
+    and the server only reports a count instead of echoing the deleted rows.
     Returns number of deleted rows (best-effort based on response).
     """
     ids = list(ids)
     if not ids:
         return 0
     sb = get_supabase()
-    # Supabase .in_ uses 'in' but Python reserves the keyword, so it's 'in_'
-    resp = sb.table(table_name).delete().in_(id_column, ids).execute()
-    data = resp.data or []
-    return len(data)
+
+    def delete_chunk(chunk: List[Any]) -> int:
+        # Supabase .in_ uses 'in' but Python reserves the keyword, so it's 'in_'
+        resp = (
+            sb.table(table_name)
+            .delete(count="exact", returning="minimal")
+            .in_(id_column, chunk)
+            .execute()
+        )
+        return resp.count or 0
+
+    chunks = [ids[i:i + DELETE_CHUNK_SIZE] for i in range(0, len(ids), DELETE_CHUNK_SIZE)]
+    if len(chunks) == 1:
+        return delete_chunk(chunks[0])
+    with ThreadPoolExecutor(max_workers=DB_MAX_WORKERS) as executor:
+        return sum(executor.map(delete_chunk, chunks))
 
 
 # -----------------------------
@@ -168,10 +306,24 @@ def delete_rows_by_ids(
 def to_df(records: List[Dict[str, Any]], *, rename: Optional[Dict[str, str]] = None):
     """
     Convert a list of dicts to a pandas DataFrame and optionally rename columns.
+    Columns come back Arrow-backed, with `date`/`*_date` columns parsed to datetimes.
     """
     import pandas as pd
 
-    df = pd.DataFrame.from_records(records)
+    if not records:
+        return pd.DataFrame()
+    # PostgREST rows all share one key set; building columns directly skips from_records' per-row inference
+    columns = {c: [r.get(c) for r in records] for c in records[0]}
+    df = pd.DataFrame(columns, copy=False)
+
+    # ISO date strings → datetimes first, then everything onto compact Arrow-backed dtypes
+    for c in df.columns:
+        if c == "date" or c.endswith("_date"):
+            df[c] = pd.to_datetime(df[c], format="ISO8601", errors="coerce")
+    try:
+        df = df.convert_dtypes(dtype_backend="pyarrow")
+    except ImportError:  # pyarrow not installed; keep NumPy/object dtypes
+        pass
     if rename:
         df = df.rename(columns=rename)
     return df
@@ -200,26 +352,46 @@ def connection_healthcheck(
 # -----------------------------
 # App-specific shortcuts
 # -----------------------------
+# Source column names ev.trips may use for the truck plate, in lookup order
+TRIP_PLATE_COLUMNS = ("plate", "truck_plate", "plate_no")
+
+
 def load_ev_trucks_df() -> "pd.DataFrame":
     """
     Load trucks master data from 'ev.trucks' into a DataFrame.
     """
-    records = fetch_table("ev.trucks", order_by="plate")
+    records = fetch_table("ev.trucks", order_by="plate", key_column="truck_id")
     return to_df(records)
 
 
-def load_ev_trips_df() -> "pd.DataFrame":
+def load_ev_trips_df(
+    columns: Optional[Sequence[str]] = None,
+    *,
+    key_column: str,
+    plate_column: Optional[str] = None,
+) -> "pd.DataFrame":
     """
     Load trips from 'ev.trips' into a DataFrame.
-    Normalizes a few common column-name variations → 'plate_number'.
+    `key_column` is the table's unique key, which the paged read orders by.
+    Pass `columns` to fetch only those columns instead of every column.
+    Pass `plate_column` (one of TRIP_PLATE_COLUMNS) when the table's plate column
+    is known; it is aliased to 'plate_number' in the select itself.
+    Otherwise the first of TRIP_PLATE_COLUMNS present is renamed → 'plate_number'.
     """
-    records = fetch_table("ev.trips", order_by="trip_date")
+    columns = list(columns) if columns else ["*"]
+    if plate_column and plate_column != "plate_number":
+        # PostgREST alias syntax: renamed by the database, no post-hoc rename needed
+        columns = [f"plate_number:{plate_column}"] + [
+            c for c in columns if c not in ("plate_number", plate_column)
+        ]
+    records = fetch_table(
+        "ev.trips", select=",".join(columns), order_by="trip_date", key_column=key_column
+    )
     df = to_df(records)
 
-    # Normalize plate column for downstream code
+    # Normalize plate column for downstream code when the schema wasn't given
     if "plate_number" not in df.columns:
-        for alt in ("plate", "truck_plate", "plate_no"):
-            if alt in df.columns:
-                df = df.rename(columns={alt: "plate_number"})
-                break
+        alt = next((c for c in TRIP_PLATE_COLUMNS if c in df.columns), None)
+        if alt:
+            df.rename(columns={alt: "plate_number"}, inplace=True)
     return df
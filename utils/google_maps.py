@@ -1,7 +1,43 @@
 import requests
 import os
+import numpy as np
+import pandas as pd
+import time
+import asyncio
 import streamlit as st
-from typing import Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+DISTANCE_MATRIX_URL = "https://maps.googleapis.com/maps/api/distancematrix/json"
+GEOCODE_URL = "https://maps.googleapis.com/maps/api/geocode/json"
+
+# Distance Matrix quota is metered in elements (origins x destinations) per second
+DM_ELEMENTS_PER_SECOND = 100
+# The API accepts at most 25 destinations per request
+DM_MAX_DESTINATIONS = 25
+# Number of Distance Matrix requests kept in flight by the bulk path
+DM_MAX_WORKERS = 8
+# Concurrent geocoding requests in geocode_many
+GEOCODE_MAX_WORKERS = 10
+# Place lookups barely change, so results are shared across sessions for a day
+MAPS_CACHE_TTL = 24 * 60 * 60
+API_KEY_VALID_TTL = 10 * 60
+API_KEY_INVALID_TTL = 60
+
+class _NoMapsResult(Exception):
+    """Raised by the cached lookups when there is nothing worth caching"""
+
+@st.cache_resource
+def _gmaps_session() -> requests.Session:
+    """
+    Shared keep-alive session for all Maps calls, so connections and TLS handshakes are reused
+    """
+    session = requests.Session()
+    retries = Retry(total=3, backoff_factor=0.3, status_forcelist=(429, 500, 502, 503, 504))
+    session.mount('https://', HTTPAdapter(pool_connections=20, pool_maxsize=20, max_retries=retries))
+    return session
 
 def get_google_maps_api_key():
     """
@@ -37,47 +73,28 @@ def calculate_distance_google_maps(from_coords: str, to_coords: str) -> Optional
         return None
     
     try:
-        # Google Maps Distance Matrix API endpoint
-        url = "https://maps.googleapis.com/maps/api/distancematrix/json"
-        
-        params = {
-            'origins': from_coords,
-            'destinations': to_coords,
-            'units': 'metric',
-            'mode': 'driving',
-            'key': api_key
-        }
-        
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
-        
-        data = response.json()
-        
-        # Check if API returned valid results
-        if data['status'] == 'OK':
-            element = data['rows'][0]['elements'][0]
-            
-            if element['status'] == 'OK':
-                # Distance is returned in meters, convert to kilometers
-                distance_km = element['distance']['value'] / 1000
-                return round(distance_km, 2)
-            else:
-                st.warning(f"Google Maps API: {element['status']}")
-                return None
-        else:
-            st.error(f"Google Maps API error: {data['status']}")
-            return None
+        return _distance_cached(from_coords, to_coords, api_key)
     
-    except requests.exceptions.RequestException as e:
-        st.error(f"Network error calling Google Maps API: {str(e)}")
-        return None
-    except KeyError as e:
-        st.error(f"Unexpected response format from Google Maps API: {str(e)}")
+    except _NoMapsResult:
         return None
+    
     except Exception as e:
-        st.error(f"Error calculating distance: {str(e)}")
+        st.warning(f"Google Maps request failed: {str(e)}")
         return None
 
+# The cached helpers below raise _NoMapsResult instead of returning None, because
+# cache_data doesn't store exceptions: a missing key, an outage or a non-OK status
+# is retried on the next call rather than replayed to every session for a day.
+@st.cache_data(ttl=MAPS_CACHE_TTL, show_spinner=False)
+def _distance_cached(from_coords: str, to_coords: str, api_key: str) -> float:
+    results, errors = asyncio.run(_calculate_distances_async([(from_coords, to_coords)], api_key))
+    if errors:
+        raise RuntimeError(errors[0])
+    distance = results[(from_coords, to_coords)]
+    if distance is None:
+        raise _NoMapsResult
+    return distance
+
 def geocode_address(address: str) -> Optional[Tuple[float, float]]:
     """
     Convert an address to coordinates using Google Maps Geocoding API
@@ -94,28 +111,75 @@ def geocode_address(address: str) -> Optional[Tuple[float, float]]:
         return None
     
     try:
-        url = "https://maps.googleapis.com/maps/api/geocode/json"
-        
-        params = {
-            'address': address,
-            'key': api_key
-        }
-        
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
-        
-        data = response.json()
-        
-        if data['status'] == 'OK' and data['results']:
-            location = data['results'][0]['geometry']['location']
-            return (location['lat'], location['lng'])
-        else:
-            return None
+        return _geocode_cached(address, api_key)
+    
+    except _NoMapsResult:
+        return None
     
     except Exception as e:
         st.error(f"Error geocoding address: {str(e)}")
         return None
 
+@st.cache_data(ttl=MAPS_CACHE_TTL, show_spinner=False)
+def _geocode_cached(address: str, api_key: str) -> Tuple[float, float]:
+    location = _geocode(address, api_key)
+    if location is None:
+        raise _NoMapsResult
+    return location
+
+def _geocode(address: str, api_key: str) -> Optional[Tuple[float, float]]:
+    params = {
+        'address': address,
+        'key': api_key
+    }
+    
+    response = _gmaps_session().get(GEOCODE_URL, params=params, timeout=10)
+    response.raise_for_status()
+    
+    data = response.json()
+    
+    if data['status'] == 'OK' and data['results']:
+        location = data['results'][0]['geometry']['location']
+        return (location['lat'], location['lng'])
+    return None
+
+def geocode_many(addresses: Iterable[str]) -> Dict[str, Optional[Tuple[float, float]]]:
+    """
+    Geocode several addresses concurrently over the shared session
+    
+    Args:
+        addresses: Street addresses or location names
+    
+    Returns:
+        Dictionary mapping each address to (latitude, longitude) or None
+    """
+    addresses = list(dict.fromkeys(addresses))
+    api_key = get_google_maps_api_key()
+    
+    if not api_key or not addresses:
+        return {address: None for address in addresses}
+    
+    # Worker threads have no Streamlit context, so failures are collected and reported here
+    errors: List[str] = []
+    
+    def lookup(address: str) -> Optional[Tuple[float, float]]:
+        # Same day-long cache as geocode_address, so repeated names aren't billed again
+        try:
+            return _geocode_cached(address, api_key)
+        except _NoMapsResult:
+            return None
+        except Exception as e:
+            errors.append(str(e))
+            return None
+    
+    with ThreadPoolExecutor(max_workers=GEOCODE_MAX_WORKERS) as executor:
+        results = dict(zip(addresses, executor.map(lookup, addresses)))
+    
+    if errors:
+        st.warning(f"{len(errors)} geocoding request(s) failed: {errors[0]}")
+    
+    return results
+
 def reverse_geocode(lat: float, lng: float) -> Optional[str]:
     """
     Convert coordinates to an address using Google Maps Reverse Geocoding API
@@ -133,27 +197,31 @@ def reverse_geocode(lat: float, lng: float) -> Optional[str]:
         return None
     
     try:
-        url = "https://maps.googleapis.com/maps/api/geocode/json"
-        
-        params = {
-            'latlng': f"{lat},{lng}",
-            'key': api_key
-        }
-        
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
-        
-        data = response.json()
-        
-        if data['status'] == 'OK' and data['results']:
-            return data['results'][0]['formatted_address']
-        else:
-            return None
+        return _reverse_geocode_cached(lat, lng, api_key)
+    
+    except _NoMapsResult:
+        return None
     
     except Exception as e:
         st.error(f"Error reverse geocoding: {str(e)}")
         return None
 
+@st.cache_data(ttl=MAPS_CACHE_TTL, show_spinner=False)
+def _reverse_geocode_cached(lat: float, lng: float, api_key: str) -> str:
+    params = {
+        'latlng': f"{lat},{lng}",
+        'key': api_key
+    }
+    
+    response = _gmaps_session().get(GEOCODE_URL, params=params, timeout=10)
+    response.raise_for_status()
+    
+    data = response.json()
+    
+    if data['status'] == 'OK' and data['results']:
+        return data['results'][0]['formatted_address']
+    raise _NoMapsResult
+
 def calculate_route_info(from_coords: str, to_coords: str) -> Optional[dict]:
     """
     Get detailed route information including distance, duration, and waypoints
@@ -171,43 +239,52 @@ def calculate_route_info(from_coords: str, to_coords: str) -> Optional[dict]:
         return None
     
     try:
-        url = "https://maps.googleapis.com/maps/api/directions/json"
-        
-        params = {
-            'origin': from_coords,
-            'destination': to_coords,
-            'mode': 'driving',
-            'units': 'metric',
-            'key': api_key
-        }
-        
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
-        
-        data = response.json()
-        
-        if data['status'] == 'OK' and data['routes']:
-            route = data['routes'][0]
-            leg = route['legs'][0]
-            
-            return {
-                'distance_km': leg['distance']['value'] / 1000,
-                'duration_minutes': leg['duration']['value'] / 60,
-                'start_address': leg['start_address'],
-                'end_address': leg['end_address'],
-                'overview_polyline': route['overview_polyline']['points']
-            }
-        else:
-            return None
+        return _route_info_cached(from_coords, to_coords, api_key)
+    
+    except _NoMapsResult:
+        return None
     
     except Exception as e:
         st.error(f"Error getting route information: {str(e)}")
         return None
 
+@st.cache_data(ttl=MAPS_CACHE_TTL, show_spinner=False)
+def _route_info_cached(from_coords: str, to_coords: str, api_key: str) -> dict:
+    url = "https://maps.googleapis.com/maps/api/directions/json"
+    
+    params = {
+        'origin': from_coords,
+        'destination': to_coords,
+        'mode': 'driving',
+        'units': 'metric',
+        'key': api_key
+    }
+    
+    response = _gmaps_session().get(url, params=params, timeout=10)
+    response.raise_for_status()
+    
+    data = response.json()
+    
+    if data['status'] == 'OK' and data['routes']:
+        route = data['routes'][0]
+        leg = route['legs'][0]
+        
+        return {
+            'distance_km': leg['distance']['value'] / 1000,
+            'duration_minutes': leg['duration']['value'] / 60,
+            'start_address': leg['start_address'],
+            'end_address': leg['end_address'],
+            'overview_polyline': route['overview_polyline']['points']
+        }
+    raise _NoMapsResult
+
 def validate_api_key() -> bool:
     """
     Validate that the Google Maps API key is working
     
+    A passing key is remembered for API_KEY_VALID_TTL, a failing one only for
+    API_KEY_INVALID_TTL, so a fixed key or a recovered outage is picked up quickly.
+    
     Returns:
         True if API key is valid, False otherwise
     """
@@ -216,15 +293,41 @@ def validate_api_key() -> bool:
     if not api_key:
         return False
     
+    return _api_key_status(api_key)
+
+def invalidate_api_key_cache() -> None:
+    """
+    Forget cached key checks so the next validate_api_key() probes the API again
+    """
+    _api_key_status.clear()
+    _api_key_accepted.clear()
+
+class _KeyRejected(Exception):
+    pass
+
+@st.cache_data(ttl=API_KEY_INVALID_TTL, show_spinner=False)
+def _api_key_status(api_key: str) -> bool:
+    try:
+        return _api_key_accepted(api_key)
+    except _KeyRejected:
+        return False
+
+@st.cache_data(ttl=API_KEY_VALID_TTL, show_spinner=False)
+def _api_key_accepted(api_key: str) -> bool:
+    # Rejections raise instead of returning False, because cache_data doesn't store exceptions
+    if not _probe_api_key(api_key):
+        raise _KeyRejected
+    return True
+
+def _probe_api_key(api_key: str) -> bool:
     try:
         # Test with a simple geocoding request
-        url = "https://maps.googleapis.com/maps/api/geocode/json"
         params = {
             'address': 'New York, NY',
             'key': api_key
         }
         
-        response = requests.get(url, params=params, timeout=5)
+        response = _gmaps_session().get(GEOCODE_URL, params=params, timeout=5)
         data = response.json()
         
         return data['status'] == 'OK'
@@ -255,17 +358,47 @@ def calculate_haversine_distance(lat1: float, lng1: float, lat2: float, lng2: fl
     
     return round(c * r, 2)
 
-def calculate_distance_fallback(from_coords: str, to_coords: str) -> Optional[float]:
+def calculate_haversine_distance_vec(lat1, lng1, lat2, lng2) -> np.ndarray:
+    """
+    Vectorized calculate_haversine_distance over arrays of decimal-degree coordinates
+    
+    Returns distances in kilometers (NaN where any input is NaN)
+    """
+    lat1, lng1, lat2, lng2 = map(np.radians, (lat1, lng1, lat2, lng2))
+    
+    dlat = lat2 - lat1
+    dlng = lng2 - lng1
+    a = np.sin(dlat/2)**2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlng/2)**2
+    
+    return np.round(6371 * 2 * np.arcsin(np.sqrt(a)), 2)
+
+def _coords_to_arrays(coords) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Split an array of "lat,lng" strings into float lat/lng arrays (NaN where unparseable)
+    """
+    parts = pd.Series(coords, dtype=object).astype(str).str.partition(',')
+    lat = pd.to_numeric(parts[0].str.strip(), errors='coerce').to_numpy(dtype=float)
+    lng = pd.to_numeric(parts[2].str.strip(), errors='coerce').to_numpy(dtype=float)
+    return lat, lng
+
+def calculate_distance_fallback(from_coords, to_coords):
     """
     Calculate distance using Haversine formula as fallback when Google Maps API is not available
     
     Args:
-        from_coords: String in format "lat,lng"
-        to_coords: String in format "lat,lng"
+        from_coords: String in format "lat,lng", or an array of them
+        to_coords: String in format "lat,lng", or an array of them
     
     Returns:
-        Distance in kilometers or None if calculation fails
+        Distance in kilometers or None if calculation fails; for array input, an
+        array of distances with NaN where a pair can't be parsed
     """
+    # Only real collections take the array path; None / pd.NA / NaN stay scalar failures
+    if isinstance(from_coords, (list, tuple, pd.Series, pd.Index, np.ndarray)):
+        from_lat, from_lng = _coords_to_arrays(from_coords)
+        to_lat, to_lng = _coords_to_arrays(to_coords)
+        return calculate_haversine_distance_vec(from_lat, from_lng, to_lat, to_lng)
+    
     try:
         from_lat, from_lng = map(float, from_coords.split(','))
         to_lat, to_lng = map(float, to_coords.split(','))
@@ -275,3 +408,146 @@ def calculate_distance_fallback(from_coords: str, to_coords: str) -> Optional[fl
     except Exception as e:
         st.error(f"Error calculating fallback distance: {str(e)}")
         return None
+
+class ElementRateLimiter:
+    """
+    Token bucket for the Distance Matrix element quota.
+
+    Google counts Distance Matrix QPS by elements, not requests, so every call
+    reserves len(origins) * len(destinations) tokens before it is sent.
+    """
+
+    def __init__(self, eps: float):
+        self.eps = float(eps)
+        self.tokens = float(eps)
+        self._last_refill = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.eps, self.tokens + (now - self._last_refill) * self.eps)
+        self._last_refill = now
+
+    async def acquire(self, n: int) -> None:
+        """Wait until n element tokens are available, then consume them."""
+        # A call larger than the bucket goes out once the bucket is full
+        needed = min(float(n), self.eps)
+        async with self._lock:
+            self._refill()
+            while self.tokens < needed:
+                await asyncio.sleep((needed - self.tokens) / self.eps)
+                self._refill()
+            self.tokens -= n
+
+async def _dm_batch(
+    session: requests.Session,
+    api_key: str,
+    origins: List[str],
+    dests: List[str],
+    limiter: ElementRateLimiter,
+) -> List[List[Optional[float]]]:
+    """
+    Run one Distance Matrix request for origins x dests.
+
+    Returns a matrix of distances in kilometers (None where the element failed).
+    """
+    await limiter.acquire(len(origins) * len(dests))
+
+    params = {
+        'origins': '|'.join(origins),
+        'destinations': '|'.join(dests),
+        'units': 'metric',
+        'mode': 'driving',
+        'key': api_key
+    }
+
+    response = await asyncio.to_thread(session.get, DISTANCE_MATRIX_URL, params=params, timeout=10)
+    response.raise_for_status()
+
+    data = response.json()
+    if data['status'] != 'OK':
+        raise RuntimeError(f"Google Maps API error: {data['status']}")
+
+    matrix = []
+    for row in data['rows']:
+        distances = []
+        for element in row['elements']:
+            if element['status'] == 'OK':
+                distances.append(round(element['distance']['value'] / 1000, 2))
+            else:
+                distances.append(None)
+        matrix.append(distances)
+    return matrix
+
+async def _calculate_distances_async(
+    pairs: List[Tuple[str, str]],
+    api_key: str,
+    on_progress: Optional[Callable[[int, int], None]] = None,
+) -> Tuple[Dict[Tuple[str, str], Optional[float]], List[str]]:
+    # One origin per request, destinations tiled to the API maximum
+    by_origin: Dict[str, List[str]] = {}
+    for from_coords, to_coords in pairs:
+        by_origin.setdefault(from_coords, []).append(to_coords)
+
+    batches = []
+    for origin, dests in by_origin.items():
+        for i in range(0, len(dests), DM_MAX_DESTINATIONS):
+            batches.append((origin, dests[i:i + DM_MAX_DESTINATIONS]))
+
+    limiter = ElementRateLimiter(DM_ELEMENTS_PER_SECOND)
+    workers = asyncio.Semaphore(DM_MAX_WORKERS)
+    results: Dict[Tuple[str, str], Optional[float]] = {}
+    errors: List[str] = []
+    done = 0
+
+    session = _gmaps_session()
+
+    async def run(origin: str, dests: List[str]) -> None:
+        nonlocal done
+        async with workers:
+            try:
+                matrix = await _dm_batch(session, api_key, [origin], dests, limiter)
+                for dest, distance in zip(dests, matrix[0]):
+                    results[(origin, dest)] = distance
+            except (requests.exceptions.RequestException, KeyError, RuntimeError) as e:
+                errors.append(str(e))
+                for dest in dests:
+                    results[(origin, dest)] = None
+        done += 1
+        if on_progress:
+            on_progress(done, len(batches))
+
+    await asyncio.gather(*(run(origin, dests) for origin, dests in batches))
+
+    return results, errors
+
+def calculate_distances_bulk(
+    pairs: Iterable[Tuple[str, str]],
+    on_progress: Optional[Callable[[int, int], None]] = None,
+) -> Dict[Tuple[str, str], Optional[float]]:
+    """
+    Calculate many distances with concurrent, element-rate-limited Distance Matrix calls
+
+    Args:
+        pairs: Iterable of (from_coords, to_coords) strings in format "lat,lng"
+        on_progress: Optional callback receiving (completed_requests, total_requests)
+
+    Returns:
+        Dictionary mapping each (from_coords, to_coords) pair to kilometers or None
+    """
+    pairs = list(dict.fromkeys(pairs))
+    if not pairs:
+        return {}
+
+    api_key = get_google_maps_api_key()
+
+    if not api_key:
+        st.warning("Google Maps API key not found. Set GOOGLE_MAPS_API_KEY environment variable.")
+        return {pair: None for pair in pairs}
+
+    results, errors = asyncio.run(_calculate_distances_async(pairs, api_key, on_progress))
+
+    if errors:
+        st.warning(f"{len(errors)} Google Maps request(s) failed: {errors[0]}")
+
+    return results
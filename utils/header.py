@@ -1,7 +1,6 @@
 # utils/header.py
-import json
+import html
 import streamlit as st
-from streamlit.components.v1 import html
 
 # ↓ Adjust this number to move the title DOWN inside the header bar
 TOP_OFFSET_PX = 0   # e.g., 0, 6, 8, 10, 12...
@@ -13,10 +12,13 @@ def inject_top_header(title: str):
     - Streamlit toolbar (File change | Rerun | Always rerun) is hidden.
     - Title can be vertically nudged down via TOP_OFFSET_PX.
     Call once per page after your left pane is rendered.
+    The title is a fixed-position node laid over the header by CSS, so no
+    script/iframe is mounted per render.
     """
 
     # Pure CSS (no JS here). Not an f-string -> no brace escaping needed.
-    st.markdown(
+    # st.html skips the markdown pipeline; a style-only block also takes no layout space.
+    st.html(
         """
         <style>
           /* Make the Streamlit header a clean bar */
@@ -42,8 +44,17 @@ def inject_top_header(title: str):
             margin-top: 0 !important;
           }
 
-          /* Our injected title node */
+          /* Our title node, pinned over the header bar */
           #dsv-top-title {
+            position: fixed;
+            top: 0;
+            left: 30px;
+            right: 30px;
+            height: 100px;
+            display: flex;
+            align-items: center;
+            z-index: 999999;        /* above Streamlit's header */
+            pointer-events: none;   /* header controls stay clickable */
             font-size: 40px;
             font-weight: 800;
             color: #002664;         /* DSV navy */
@@ -58,32 +69,11 @@ def inject_top_header(title: str):
             #dsv-top-title { font-size: 60px; }
           }
         </style>
-        """,
-        unsafe_allow_html=True,
+        """
     )
 
-    # JS must run via components.html so we can inject into the real header.
-    # We set padding-top on the title to move it down by TOP_OFFSET_PX.
-    js = f"""
-    <script>
-      (function() {{
-        try {{
-          const header = window.parent.document.querySelector('header[data-testid="stHeader"]');
-          if (!header) return;
-
-          let titleEl = header.querySelector('#dsv-top-title');
-          if (!titleEl) {{
-            titleEl = document.createElement('div');
-            titleEl.id = 'dsv-top-title';
-            header.appendChild(titleEl);
-          }}
-          titleEl.textContent = {json.dumps(title)};
-          titleEl.style.paddingTop = '{TOP_OFFSET_PX}px';   // ↓ move title down here
-        }} catch (e) {{
-          console.error('Header inject error:', e);
-        }}
-      }})();
-    </script>
-    """
-
-    html(js, height=0)
+    # Padding-top moves the title down by TOP_OFFSET_PX.
+    st.markdown(
+        f'<div id="dsv-top-title" style="padding-top:{TOP_OFFSET_PX}px;">{html.escape(title)}</div>',
+        unsafe_allow_html=True,
+    )
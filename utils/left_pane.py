@@ -1,6 +1,8 @@
 # utils/left_pane.py
 import os
+import re
 import base64
+import functools
 from pathlib import Path
 from typing import Optional
 import streamlit as st
@@ -8,6 +10,12 @@ import streamlit as st
 
 # ------------------------- helpers -------------------------
 
+_CSS_COMMENT = re.compile(r"/\*.*?\*/", re.S)
+_CSS_SPACE = re.compile(r"\s+")
+_CSS_PUNCT_SPACE = re.compile(r"\s*([{};,>])\s*")
+_CSS_COLON_SPACE = re.compile(r":\s+")
+
+
 def _best_path(user_path: str) -> Optional[Path]:
     """Try several locations to resolve an asset path."""
     here = Path(__file__).resolve().parent
@@ -16,9 +24,9 @@ def _best_path(user_path: str) -> Optional[Path]:
         Path(os.getcwd()) / user_path,
         here / user_path,
         here / ".." / user_path,
-        here.parent / "assets" / "dsv_logo.png",   # common case
-        Path("assets/dsv_logo.png"),
-        Path("/app/assets/dsv_logo.png"),          # some hosts
+        here.parent / "static" / "dsv_logo.png",   # common case
+        Path("static/dsv_logo.png"),
+        Path("/app/static/dsv_logo.png"),          # some hosts
     ]
     for p in candidates:
         try:
@@ -35,7 +43,9 @@ def _b64_from_path(p: str) -> str:
         return base64.b64encode(f.read()).decode("utf-8")
 
 
-def _b64_logo(user_path: str) -> str:
+@functools.lru_cache(maxsize=16)
+def _resolve_and_encode(user_path: str) -> str:
+    """Resolve and encode once per process, so reruns skip the path probes."""
     p = _best_path(user_path)
     if not p:
         return ""
@@ -45,9 +55,20 @@ def _b64_logo(user_path: str) -> str:
         return ""
 
 
-# ------------------------- public API -------------------------
+def _b64_logo(user_path: str) -> str:
+    return _resolve_and_encode(user_path)
 
-def setup_left_pane(
+
+def _minify_css(css: str) -> str:
+    """Drop comments and collapse whitespace; only space after ':' is touched, never before."""
+    css = _CSS_COMMENT.sub("", css)
+    css = _CSS_SPACE.sub(" ", css)
+    css = _CSS_PUNCT_SPACE.sub(r"\1", css)
+    return _CSS_COLON_SPACE.sub(":", css).strip()
+
+
+@functools.lru_cache(maxsize=8)
+def _build_left_pane_css(
     *,
     # Sidebar (left pane) styling — DSV defaults
     sidebar_width_px: int = 210,
@@ -55,8 +76,9 @@ def setup_left_pane(
     link_padding_v_px: int = 2,          # vertical padding inside each link
     link_gap_v_px: int = 1,              # vertical gap between links
     sidebar_top_padding_px: int = 120,   # moves links below the logo
-    # Sidebar logo (in the blue strip) — base64 background
-    sidebar_logo_path: str = "assets/dsv_logo.png",
+    # Sidebar logo (in the blue strip) — served file, base64 fallback when no URL
+    sidebar_logo_url: Optional[str] = "app/static/dsv_logo.png",
+    sidebar_logo_path: str = "static/dsv_logo.png",
     sidebar_logo_width_px: int = 270,
     sidebar_logo_height_px: int = 90,
     sidebar_logo_left_px: int = 10,
@@ -66,11 +88,8 @@ def setup_left_pane(
     foundry_font_path: Optional[str] = "assets/Foundry%20Sterling/bold%20headline.otf",
     # Misc
     hide_keyboard_label: bool = True,
-) -> None:
-    """
-    Inject CSS for the left pane (sidebar) and global theme.
-    Call once at the top of every page.
-    """
+) -> str:
+    """Build the left pane/theme <style> block; it depends only on the arguments."""
     # fonts
     roboto_css = (
         "@import url('https://fonts.googleapis.com/css2?family=Roboto:wght@300;400;500;600;700&display=swap');"
@@ -88,8 +107,12 @@ def setup_left_pane(
         }}
         """
 
-    # sidebar logo base64 (matches your older working approach)
-    logo_b64 = _b64_logo(sidebar_logo_path)
+    # sidebar logo: Streamlit's static serving sends the PNG once and the browser caches it;
+    # without a URL, fall back to embedding it base64 (the older working approach)
+    logo_src = sidebar_logo_url or ""
+    if not logo_src:
+        logo_b64 = _b64_logo(sidebar_logo_path)
+        logo_src = f"data:image/png;base64,{logo_b64}" if logo_b64 else ""
 
     # optional hide keyboard label
     keyboard_hide_css = ""
@@ -100,7 +123,7 @@ def setup_left_pane(
         section[data-testid="stSidebar"] [aria-label*="keyboard" i] { display: none !important; }
         """
 
-    st.markdown(f"""
+    css = f"""
 <style>
 /* ===== Fonts ===== */
 {roboto_css}
@@ -156,7 +179,7 @@ section[data-testid="stSidebar"]::before {{
   height: {sidebar_logo_height_px}px;
   background-repeat: no-repeat;
   background-size: contain;
-  {'background-image: url("data:image/png;base64,' + logo_b64 + '");' if logo_b64 else ''}
+  {'background-image: url("' + logo_src + '");' if logo_src else ''}
   pointer-events: none;
 }}
 
@@ -274,27 +297,69 @@ h3 {{ color: #002664 !important; font-weight: 500 !important; font-size: 1.4rem
 .stDownloadButton > button {{ background-color: #002664; color: white; border: none; border-radius: 6px; padding: 0.75rem 1.5rem; font-weight: 500; }}
 .stDownloadButton > button:hover {{ background-color: #001a4d; }}
 </style>
-""",
-        unsafe_allow_html=True,
-    )
+"""
+    return _minify_css(css)
 
 
-def render_header(
-    title: str,
+# ------------------------- public API -------------------------
+
+def setup_left_pane(
     *,
-    # Optional header logo (off by default to avoid duplicate with sidebar logo)
-    show_header_logo: bool = False,
-    header_logo_path: str = "assets/dsv_logo.png",
-    header_logo_height_px: int = 60,
-    # Title options
-    top_offset_px: int = 10,
-    title_size_px: int = 36,
-    title_color: str = "#002664",
+    # Sidebar (left pane) styling — DSV defaults
+    sidebar_width_px: int = 210,
+    sidebar_font_size_px: int = 23,
+    link_padding_v_px: int = 2,          # vertical padding inside each link
+    link_gap_v_px: int = 1,              # vertical gap between links
+    sidebar_top_padding_px: int = 120,   # moves links below the logo
+    # Sidebar logo (in the blue strip) — served file, base64 fallback when no URL
+    sidebar_logo_url: Optional[str] = "app/static/dsv_logo.png",
+    sidebar_logo_path: str = "static/dsv_logo.png",
+    sidebar_logo_width_px: int = 270,
+    sidebar_logo_height_px: int = 90,
+    sidebar_logo_left_px: int = 10,
+    sidebar_logo_top_px: int = 10,
+    # Fonts
+    body_font_import: bool = True,   # import Roboto for body
+    foundry_font_path: Optional[str] = "assets/Foundry%20Sterling/bold%20headline.otf",
+    # Misc
+    hide_keyboard_label: bool = True,
 ) -> None:
     """
-    Render a consistent header row with (optional) logo + page title aligned.
-    Use after setup_left_pane().
+    Inject CSS for the left pane (sidebar) and global theme.
+    Call once at the top of every page.
     """
+    # Streamlit drops elements a rerun doesn't re-emit, so only the string building is cached
+    css = _build_left_pane_css(
+        sidebar_width_px=sidebar_width_px,
+        sidebar_font_size_px=sidebar_font_size_px,
+        link_padding_v_px=link_padding_v_px,
+        link_gap_v_px=link_gap_v_px,
+        sidebar_top_padding_px=sidebar_top_padding_px,
+        sidebar_logo_url=sidebar_logo_url,
+        sidebar_logo_path=sidebar_logo_path,
+        sidebar_logo_width_px=sidebar_logo_width_px,
+        sidebar_logo_height_px=sidebar_logo_height_px,
+        sidebar_logo_left_px=sidebar_logo_left_px,
+        sidebar_logo_top_px=sidebar_logo_top_px,
+        body_font_import=body_font_import,
+        foundry_font_path=foundry_font_path,
+        hide_keyboard_label=hide_keyboard_label,
+    )
+    st.html(css)
+
+
+@functools.lru_cache(maxsize=32)
+def _build_header_html(
+    title: str,
+    *,
+    show_header_logo: bool,
+    header_logo_path: str,
+    header_logo_height_px: int,
+    top_offset_px: int,
+    title_size_px: int,
+    title_color: str,
+) -> str:
+    """Interpolate the header row once per title/argument set."""
     logo_html = ""
     if show_header_logo:
         b64 = _b64_logo(header_logo_path)
@@ -309,14 +374,38 @@ def render_header(
                 'border-radius:4px;font-weight:700;">DSV</div>'
             )
 
-    st.markdown(
-        f"""
+    return f"""
         <div id="global-header" style="margin-top:{top_offset_px}px;">
           {logo_html}
           <div class="global-page-title" style="font-size:{title_size_px}px; color:{title_color};">
             {title}
           </div>
         </div>
-        """,
-        unsafe_allow_html=True,
-    )
+        """
+
+
+def render_header(
+    title: str,
+    *,
+    # Optional header logo (off by default to avoid duplicate with sidebar logo)
+    show_header_logo: bool = False,
+    header_logo_path: str = "static/dsv_logo.png",
+    header_logo_height_px: int = 60,
+    # Title options
+    top_offset_px: int = 10,
+    title_size_px: int = 36,
+    title_color: str = "#002664",
+) -> None:
+    """
+    Render a consistent header row with (optional) logo + page title aligned.
+    Use after setup_left_pane().
+    """
+    st.html(_build_header_html(
+        title,
+        show_header_logo=show_header_logo,
+        header_logo_path=header_logo_path,
+        header_logo_height_px=header_logo_height_px,
+        top_offset_px=top_offset_px,
+        title_size_px=title_size_px,
+        title_color=title_color,
+    ))